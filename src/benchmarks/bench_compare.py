@@ -0,0 +1,64 @@
+# bench_compare.py
+"""
+compare_strings() over a corpus of listings, most of which match their
+source files, versus eagerly creating the diffs for every comparison
+(as compare_strings() used to). Run from src/ with:
+python -m benchmarks.bench_compare
+"""
+import random
+import time
+from typing import Callable, List, Tuple
+from markdown_tools.compare_strings import compare_strings, create_diffs
+
+
+def listing(n: int, lines: int) -> str:
+    return "".join(
+        f"    result_{n} = compute({i}, {n})  # line {i}\n"
+        for i in range(lines)
+    )
+
+
+def corpus(
+    count: int, mismatched: float
+) -> List[Tuple[str, str]]:
+    "Pairs of (example, source); a fraction are mismatched"
+    rng = random.Random(1)
+    pairs = []
+    for n in range(count):
+        example = listing(n, rng.randint(10, 80))
+        source = example
+        if rng.random() < mismatched:
+            lines = source.splitlines(True)
+            lines[len(lines) // 2] = "    changed = True\n"
+            if rng.random() < 0.5:
+                lines.insert(1, "\n")
+            source = "".join(lines)
+        pairs.append((example, source))
+    return pairs
+
+
+def eager(example: str, source: str) -> None:
+    create_diffs(example, source)
+    compare_strings(example, source)
+
+
+def lazy(example: str, source: str) -> None:
+    compare_strings(example, source)
+
+
+def seconds(
+    compare: Callable[[str, str], None], pairs: List[Tuple[str, str]]
+) -> float:
+    start = time.perf_counter()
+    for example, source in pairs:
+        compare(example, source)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    for mismatched in (0.0, 0.05, 0.5):
+        pairs = corpus(1000, mismatched)
+        print(f"1000 listings, {mismatched:.0%} mismatched:")
+        for compare in (eager, lazy):
+            elapsed = seconds(compare, pairs)
+            print(f"  {compare.__name__:6} {elapsed * 1000:8.1f} ms")
@@ -0,0 +1,54 @@
+# bench_diff_engines.py
+"""
+The diff engines in compare_strings over listings of increasing
+length, with a few scattered edits or with a replaced block. On a
+large replaced block difflib.Differ runs for minutes before exceeding
+the recursion limit, so it is skipped there. Run from src/ with:
+python -m benchmarks.bench_diff_engines
+"""
+import random
+import time
+from typing import List, Tuple
+from markdown_tools.compare_strings import DIFF_ENGINES
+
+
+def edited_listing(lines: int) -> Tuple[List[str], List[str]]:
+    "A listing and a copy with about 1% of its lines changed"
+    rng = random.Random(lines)
+    original = [
+        f"    value_{i % 50} = compute({i})" if i % 7 else "    }"
+        for i in range(lines)
+    ]
+    edited = list(original)
+    for _ in range(max(1, lines // 100)):
+        edited[rng.randrange(len(edited))] = "    changed = True"
+    return original, edited
+
+
+def replaced_block(lines: int) -> Tuple[List[str], List[str]]:
+    "A listing and a copy with its middle third rewritten"
+    original = [
+        f"    result = compute({i}, {i * 7})" for i in range(lines)
+    ]
+    third = lines // 3
+    edited = (
+        original[:third]
+        + [f"{line}  # Changed" for line in original[third:-third]]
+        + original[-third:]
+    )
+    return original, edited
+
+
+if __name__ == "__main__":
+    for lines in (100, 1000, 5000):
+        for inputs in (edited_listing, replaced_block):
+            original, edited = inputs(lines)
+            print(f"{lines} lines, {inputs.__name__}:")
+            for name, engine in DIFF_ENGINES.items():
+                slow = inputs is replaced_block and lines > 1000
+                if name == "difflib" and slow:
+                    continue
+                start = time.perf_counter()
+                list(engine(original, edited))
+                elapsed = time.perf_counter() - start
+                print(f"  {name:8} {elapsed * 1000:10.1f} ms")
@@ -0,0 +1,67 @@
+# bench_import.py
+"""
+Reports the `python -X importtime` cost of starting `mt`: the total,
+the share that belongs to tools.py and markdown_tools, and the slowest
+modules. Run from src/ with:
+python -m benchmarks.bench_import
+"""
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, NamedTuple
+
+SRC = Path(__file__).parent.parent
+
+
+class ImportTime(NamedTuple):
+    self_us: int
+    cumulative_us: int
+
+
+def import_times(module: str = "tools") -> Dict[str, ImportTime]:
+    "Import module in a fresh interpreter; times by module name"
+    stderr = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {module}",
+        ],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times: Dict[str, ImportTime] = {}
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[0].strip().isdigit():
+            times[fields[2].strip()] = ImportTime(
+                int(fields[0]), int(fields[1])
+            )
+    return times
+
+
+def own_us(times: Dict[str, ImportTime]) -> int:
+    "Time spent in tools.py and markdown_tools themselves"
+    return sum(
+        time.self_us
+        for name, time in times.items()
+        if name == "tools" or name.split(".")[0] == "markdown_tools"
+    )
+
+
+if __name__ == "__main__":
+    times = import_times()
+    for label, us in (
+        ("import tools", times["tools"].cumulative_us),
+        ("  typer", times["typer"].cumulative_us),
+        ("  own code", own_us(times)),
+    ):
+        print(f"{label + ':':14}{us / 1000:7.1f} ms")
+    print("Slowest modules (self time):")
+    slowest = sorted(times.items(), key=lambda item: -item[1].self_us)
+    for name, time in slowest[:15]:
+        print(f"  {time.self_us / 1000:7.1f} ms  {name}")
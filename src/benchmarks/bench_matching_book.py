@@ -0,0 +1,75 @@
+# bench_matching_book.py
+"""
+mt 4 (edit_example_changes) over a synthetic book of 500 listings that
+all match their source files: comparing every listing in full, as it
+used to, versus the first run with listings_with_sources(), which
+records source digests, and later runs that use them. Run from src/:
+python -m benchmarks.bench_matching_book
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from markdown_tools.compare_strings import compare_strings
+from markdown_tools.edit_changed_examples import edit_example_changes
+from markdown_tools.markdown_file import MarkdownFile, SourceCode
+
+CHAPTERS = 10
+LISTINGS = 50  # Per chapter
+
+
+def make_book(root: Path) -> List[Path]:
+    code = root / "code"
+    code.mkdir()
+    chapters = []
+    for c in range(CHAPTERS):
+        listings = []
+        for n in range(LISTINGS):
+            name = f"example_{c}_{n}.py"
+            text = f"# {name}\n" + "".join(
+                f"value_{i} = compute({i}, {n})\n" for i in range(30)
+            )
+            (code / name).write_text(text, encoding="utf-8")
+            listings.append(f"Text\n\n```python\n{text}```\n")
+        md = root / f"{c:02}.md"
+        md.write_text(
+            f"%%\npath: {code.as_posix()}\n%%\n" + "".join(listings),
+            encoding="utf-8",
+        )
+        chapters.append(md)
+    return chapters
+
+
+def full_comparison(md: Path) -> None:
+    "What edit_example_changes() did for each listing"
+    md_file = MarkdownFile(md)
+    for code_path, example in md_file.code_path_and_example_code():
+        assert code_path.path is not None  # Every listing has a path
+        full_path = Path(code_path.path) / example.source_file_name
+        source = SourceCode.from_source_file(full_path)
+        compare_strings(example.code, source.code)
+
+
+def seconds(processor, chapters: List[Path]) -> float:
+    start = time.perf_counter()
+    for md in chapters:
+        processor(md)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["MT_CACHE_DIR"] = str(Path(root) / "cache")
+        chapters = make_book(Path(root))
+        for md in chapters:
+            MarkdownFile(md)  # Fill the parse cache
+        runs = [
+            ("full comparison", full_comparison),
+            ("recording digests", edit_example_changes),
+            ("using digests", edit_example_changes),
+        ]
+        print(f"{CHAPTERS * LISTINGS} matching listings:")
+        for label, processor in runs:
+            elapsed = seconds(processor, chapters)
+            print(f"  {label:18} {elapsed * 1000:7.1f} ms")
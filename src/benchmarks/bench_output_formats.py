@@ -0,0 +1,62 @@
+# bench_output_formats.py
+"""
+mt 6 (validate_codepath_tags) over a synthetic book of 2000 listings,
+writing its report through rich versus as JSON Lines, with stdout
+sent to os.devnull. Run from src/ with:
+python -m benchmarks.bench_output_formats
+"""
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import List
+from markdown_tools import records
+from markdown_tools.insert_codepath_tags import validate_codepath_tags
+from markdown_tools.markdown_file import MarkdownFile
+
+CHAPTERS = 20
+LISTINGS = 100  # Per chapter
+
+
+def make_book(root: Path) -> List[Path]:
+    code = root / "code"
+    code.mkdir()
+    chapters = []
+    for c in range(CHAPTERS):
+        listings = []
+        for n in range(LISTINGS):
+            name = f"example_{c}_{n}.py"
+            text = f"# {name}\nvalue = compute({n})\n"
+            (code / name).write_text(text, encoding="utf-8")
+            listings.append(f"Text\n\n```python\n{text}```\n")
+        md = root / f"{c:02}.md"
+        md.write_text(
+            f"%%\npath: {code.as_posix()}\n%%\n" + "".join(listings),
+            encoding="utf-8",
+        )
+        chapters.append(md)
+    return chapters
+
+
+def seconds(format: str, chapters: List[Path]) -> float:
+    records.set_format(format)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        for md in chapters:
+            validate_codepath_tags(md)
+        elapsed = time.perf_counter() - start
+    records.set_format("rich")
+    return elapsed
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["MT_CACHE_DIR"] = str(Path(root) / "cache")
+        chapters = make_book(Path(root))
+        for md in chapters:
+            MarkdownFile(md)  # Fill the parse cache
+        print(f"{CHAPTERS * LISTINGS} listings:")
+        for format in records.FORMATS:
+            elapsed = min(seconds(format, chapters) for _ in range(3))
+            print(f"  {format:6} {elapsed * 1000:7.1f} ms")
@@ -0,0 +1,93 @@
+# bench_parse.py
+"""
+Parse throughput of the line-based MarkdownScanner parser versus
+the single-pass tokenizer used by MarkdownFile. Run from src/ with:
+python -m benchmarks.bench_parse
+"""
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+from markdown_tools.markdown_file import (
+    MarkdownFile,
+    MarkdownPart,
+    MarkdownScanner,
+)
+
+PARAGRAPH = (
+    "Some prose describing the example that follows, long enough to\n"
+    "wrap across several lines the way a typical paragraph does.\n"
+) * 4
+
+LISTING = "".join(
+    f"    total += values[{i}] * weights[{i}]  # step {i}\n"
+    for i in range(20)
+)
+
+SECTION = """\
+{paragraph}
+{paragraph}
+
+%%
+path: C:/git/python-experiments/chapter
+%%
+
+```python
+# example_{n}.py
+def f(values: list[int], weights: list[int]) -> int:
+    total = {n}
+{listing}    return total
+```
+
+```text
+{n}
+```
+
+%%
+A plain comment
+%%
+
+{paragraph}
+"""
+
+
+def synthetic_chapter(sections: int) -> str:
+    return "".join(
+        SECTION.format(n=n, paragraph=PARAGRAPH, listing=LISTING)
+        for n in range(sections)
+    )
+
+
+def throughput(
+    parse: Callable[[Path], List[MarkdownPart]],
+    md: Path,
+    repeat: int,
+) -> float:
+    "Best-of-repeat MB/s"
+    size = len(md.read_bytes()) / 1_000_000
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(md)
+        best = min(best, time.perf_counter() - start)
+    return size / best
+
+
+def line_based(md: Path) -> List[MarkdownPart]:
+    return list(MarkdownFile.parse(MarkdownScanner(md)))
+
+
+def single_pass(md: Path) -> List[MarkdownPart]:
+    return MarkdownFile(md).contents
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        md = Path(tmp) / "chapter.md"
+        md.write_text(synthetic_chapter(1000), encoding="utf-8")
+        assert "".join(map(repr, line_based(md))) == "".join(
+            map(repr, single_pass(md))
+        )
+        print(f"{md.stat().st_size / 1_000_000:.2f} MB chapter")
+        for parse in (line_based, single_pass):
+            print(f"{parse.__name__:12} {throughput(parse, md, 5):7.2f} MB/s")
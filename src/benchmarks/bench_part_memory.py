@@ -0,0 +1,77 @@
+# bench_part_memory.py
+"""
+Memory held by each kind of MarkdownPart after parsing a synthetic
+book, counting every object a part refers to once (so strings shared
+between parts aren't counted twice). Run from src/ with:
+python -m benchmarks.bench_part_memory
+"""
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Set
+from markdown_tools.markdown_file import MarkdownFile
+
+CHAPTERS = 20
+LISTINGS = 100  # Per chapter
+
+
+def chapter_text(chapter: int) -> str:
+    parts = [f"%%\npath: C:/git/book/chapter_{chapter}\n%%\n"]
+    for n in range(LISTINGS):
+        parts.append(
+            f"Paragraph {n} about the example.\n"
+            + "More text about what it shows.\n\n"
+            + f"```python\n# example_{chapter}_{n}.py\n"
+            + "".join(f"value_{i} = compute({i})\n" for i in range(20))
+            + "```\n\n"
+            + "%%\nA note for the author\nover two lines\n%%\n"
+        )
+    return "".join(parts)
+
+
+def deep_size(obj: Any, seen: Set[int]) -> int:
+    "Bytes used by obj and everything it refers to, not yet in seen"
+    if id(obj) in seen or isinstance(obj, (type, bool, int)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, dict):
+        size += sum(
+            deep_size(key, seen) + deep_size(value, seen)
+            for key, value in obj.items()
+        )
+    elif not isinstance(obj, str):
+        if hasattr(obj, "__dict__"):
+            size += deep_size(obj.__dict__, seen)
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(obj, name):
+                    size += deep_size(getattr(obj, name), seen)
+    return size
+
+
+def part_memory() -> Dict[str, List[int]]:
+    "Part class name -> bytes used by each part of that class"
+    parts = [  # All kept, so no id() is reused
+        part
+        for chapter in range(CHAPTERS)
+        for part in MarkdownFile.tokenize(chapter_text(chapter))
+    ]
+    sizes: Dict[str, List[int]] = defaultdict(list)
+    seen: Set[int] = set()
+    for part in parts:
+        sizes[type(part).__name__].append(deep_size(part, seen))
+    return sizes
+
+
+if __name__ == "__main__":
+    sizes = part_memory()
+    print(f"{CHAPTERS} chapters of {LISTINGS} listings:")
+    for name, part_sizes in sorted(sizes.items()):
+        print(
+            f"  {name:10} {len(part_sizes):6} parts"
+            + f" {sum(part_sizes) / len(part_sizes):8.0f} bytes each"
+        )
+    total = sum(sum(part_sizes) for part_sizes in sizes.values())
+    print(f"  {'Total':10} {total / 1e6:20.2f} MB")
@@ -0,0 +1,49 @@
+# bench_source_reads.py
+"""
+Reading a chapter's source files one at a time versus together with
+read_sources(), on a simulated network drive that adds a fixed delay
+to every read. Run from src/ with:
+python -m benchmarks.bench_source_reads
+"""
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from unittest import mock
+from markdown_tools import source_reader
+
+LATENCY = 0.005  # Seconds per read on the simulated network drive
+
+
+def source_files(directory: Path, count: int) -> List[Path]:
+    paths = []
+    for n in range(count):
+        path = directory / f"example_{n}.py"
+        path.write_text(f"# {path.name}\n" + "x = 1\n" * 40)
+        paths.append(path)
+    return paths
+
+
+def slow_read(path: Path) -> str | None:
+    time.sleep(LATENCY)
+    return path.read_text(encoding="utf-8")
+
+
+if __name__ == "__main__":
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        mock.patch.object(source_reader, "_read", slow_read),
+    ):
+        for count in (10, 40, 160):
+            paths = source_files(Path(directory), count)
+            start = time.perf_counter()
+            for path in paths:
+                slow_read(path)
+            serial = time.perf_counter() - start
+            start = time.perf_counter()
+            source_reader.read_sources(paths)
+            pooled = time.perf_counter() - start
+            print(
+                f"{count:4} files: serial {serial * 1000:7.1f} ms,"
+                f" read_sources {pooled * 1000:7.1f} ms"
+            )
@@ -0,0 +1,99 @@
+# book.py
+"""
+All the Markdown files in a book's directory, each parsed once, so
+several checks and cross-chapter queries can share them. The numbered
+chapters come first, in NumberedFile order, then the appendices, then
+any other Markdown files.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+from .check_markdown import display_check_markdown
+from .display_comments import display_markdown_comments
+from .error_reporter import CheckFailure, check, collect
+from .insert_codepath_tags import validate_codepath_tags
+from .markdown_file import MarkdownFile
+from .numbered_file import NumberedFile
+from .usage_index import Usage, listing_sources, path_key
+
+
+class Book:
+    def __init__(self, directory: Path = Path("."), jobs: int = 1):
+        """
+        jobs: the number of parsing processes (0: one per CPU).
+        With --keep-going, files that fail are left out of chapters
+        and kept in failures.
+        """
+        self.directory = directory
+        files = Book.discover(directory)
+        parsed: Iterator[Any]  # MarkdownFiles, or CheckFailures
+        if jobs == 1 or len(files) < 2:
+            parsed = (collect(MarkdownFile, md) for md in files)
+        else:
+            from .parallel import map_files
+
+            parsed = map_files(MarkdownFile, files, jobs=jobs)
+        self.chapters: Dict[Path, MarkdownFile] = {}
+        self.failures: List[CheckFailure] = []
+        for md, md_file in zip(files, parsed):
+            if isinstance(md_file, CheckFailure):
+                self.failures.append(md_file)
+            else:
+                self.chapters[md] = md_file
+        self.users: Dict[str, List[Usage]] = {}  # Source key -> uses
+        for md, md_file in self.chapters.items():
+            for source, listings in listing_sources(
+                md, md_file
+            ).items():
+                self.users.setdefault(source, []).extend(
+                    Usage(md, listing) for listing in listings
+                )
+
+    @staticmethod
+    def discover(directory: Path) -> List[Path]:
+        "The Markdown files in directory, in book order"
+        numbered = [
+            directory / numbered.original_name
+            for numbered in NumberedFile.chapters(directory).files
+            + NumberedFile.appendices(directory).files
+        ]
+        others = sorted(set(directory.glob("*.md")) - set(numbered))
+        return [
+            md
+            for md in numbered + others
+            if not md.name.endswith(".tmp.md")
+        ]
+
+    def __iter__(self) -> Iterator[Tuple[Path, MarkdownFile]]:
+        return iter(self.chapters.items())
+
+    def __len__(self) -> int:
+        return len(self.chapters)
+
+    def uses(self, source: Path | str) -> List[Usage]:
+        "The listings taken from source, in book order"
+        return self.users.get(path_key(source), [])
+
+    def chapters_using(self, source: Path | str) -> List[Path]:
+        "In book order"
+        return list(
+            dict.fromkeys(use.chapter for use in self.uses(source))
+        )
+
+
+def validate_book(book: Book) -> int:
+    """
+    `mt 1`, `mt 2` and `mt 3` for each chapter in turn. Returns the
+    number of listings that failed code path validation. With
+    --keep-going, a chapter that fails a check is added to
+    book.failures and the next chapter is checked.
+    """
+    failures = 0
+    for md, md_file in book:
+        check.start_file(md)
+        try:
+            display_check_markdown(md, md_file)
+            display_markdown_comments(md, md_file)
+            failures += validate_codepath_tags(md, md_file)
+        except CheckFailure as failure:
+            book.failures.append(failure)
+    return failures
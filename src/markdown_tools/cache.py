@@ -0,0 +1,58 @@
+# cache.py
+"""
+Files that markdown_tools keeps between runs. They live in
+~/.cache/markdown_tools unless MT_CACHE_DIR names another directory.
+Anything that can't be read back is treated as a cache miss.
+"""
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any
+
+
+def cache_dir() -> Path:
+    directory = Path(
+        os.environ.get(
+            "MT_CACHE_DIR", Path.home() / ".cache" / "markdown_tools"
+        )
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def cache_file(kind: str, key: str) -> Path:
+    "Cache file holding `kind` data for key, such as an absolute path"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return cache_dir() / f"{kind}-{digest}.pickle"
+
+
+def load(path: Path, version: int) -> Any:
+    "The cached value, or None if it is missing, unreadable or outdated"
+    try:
+        with path.open("rb") as f:
+            cached_version, value = pickle.load(f)
+    except Exception:
+        return None
+    return value if cached_version == version else None
+
+
+def save(
+    path: Path, version: int, value: Any, mode: int = 0o666
+) -> None:
+    """
+    Replace path atomically, so readers never see a partial file.
+    The new file is created with mode (less the umask) from the start.
+    """
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+    try:
+        tmp.unlink(missing_ok=True)  # So it's created with mode
+        fd = os.open(tmp, flags | getattr(os, "O_BINARY", 0), mode)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(
+                (version, value), f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(tmp, path)
+    except OSError:  # Another process has it; the cache is optional
+        tmp.unlink(missing_ok=True)
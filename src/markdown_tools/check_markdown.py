@@ -1,23 +1,21 @@
 #: check_markdown.py
-from io import StringIO
+import time
 from pathlib import Path
+from . import records
 from .markdown_file import MarkdownFile
-from .error_reporter import check
+from .error_reporter import CheckFailure, check
 from .console import console
 
 
-def check_markdown(md: Path):
-    markdown = MarkdownFile(md)
+def check_markdown(md: Path, markdown: MarkdownFile | None = None):
+    "markdown: md, if it's already parsed"
+    if markdown is None:
+        markdown = MarkdownFile(md)
     for code_path in markdown.code_paths():
         console.print(f"\npath: {code_path.path}")
-    # Regenerate markdown file into memory:
-    new_markdown = StringIO()
-    new_markdown.write(
-        "".join([repr(section) for section in markdown])
-    )
-    new_markdown.seek(0)
-    # Compare regenerated file to file on disk:
-    if new_markdown.read() == md.read_text(encoding="utf-8"):
+    # Compare the parts with the file as it was read:
+    line = markdown.first_difference()
+    if line is None:
         return "[green bold][OK][/green bold]"
     else:
         comparison_file_path = markdown.file_path.with_suffix(
@@ -27,4 +25,33 @@ def check_markdown(md: Path):
         check.error(
             f"Regenerated file '{comparison_file_path.name}'\n"
             + f"is not the same as original '{md.name}'\n"
+            + f"from line {line}\n"
         )
+
+
+def display_check_markdown(
+    md: Path, markdown: MarkdownFile | None = None
+) -> None:
+    "Display the file name followed by the check_markdown() result"
+    if records.json_lines():
+        start = time.perf_counter()
+        if markdown is None:
+            markdown = MarkdownFile(md)
+        line = markdown.first_difference()
+        records.emit(
+            "check",
+            file=md,
+            status="ok" if line is None else "different",
+            line=line,
+            seconds=round(time.perf_counter() - start, 6),
+        )
+        if line is not None:
+            check_markdown(md, markdown)  # Writes .tmp.md, exits
+        return
+    console.print(f"{md.name} ", end="")
+    assert md.exists(), f"{md} does not exist"
+    try:
+        console.print(check_markdown(md, markdown))
+    except CheckFailure:  # --keep-going reports it at the end
+        console.print("[red bold][FAILED][/red bold]")
+        raise
@@ -0,0 +1,79 @@
+# client.py
+"""
+`mtc` sends a command to the `mt serve` process for the current
+directory and prints the reply, which avoids the startup, imports
+and parsing that `mt` pays on every run. Commands the server doesn't
+handle, or any command when no server is running, are run by `mt`,
+as are commands run with different MT_* settings than the server's.
+Only lightweight modules are imported here, to keep startup fast.
+"""
+import json
+import os
+import shutil
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+from . import cache
+
+SERVER_VERSION = 1
+
+# The environment settings that change what a command does, with the
+# value each module uses when it isn't set:
+SETTINGS = {
+    "MT_FORMAT": "rich",
+    "MT_KEEP_GOING": "",
+    "MT_TRACE": "off",
+    "MT_DIFF_ENGINE": "auto",
+    "MT_NO_CACHE": "",
+    "MT_LANGUAGES": "",
+}
+
+
+def settings() -> Dict[str, str]:
+    "A served command must have the same settings as the client"
+    return {
+        name: os.environ.get(name, default)
+        for name, default in SETTINGS.items()
+    }
+
+
+def address_file(root: Path) -> Path:
+    "Records (host, port, token) for the server for directory root"
+    return cache.cache_file("server", root.absolute().as_posix())
+
+
+def request(args: List[str]) -> Dict[str, Any] | None:
+    "The server's reply to `mt args`, or None if there's no server"
+    address = cache.load(address_file(Path.cwd()), SERVER_VERSION)
+    if address is None:
+        return None
+    host, port, token = address
+    message = {
+        "token": token,
+        "args": args,
+        "settings": settings(),
+        "width": shutil.get_terminal_size().columns,
+        "color": sys.stdout.isatty(),
+    }
+    try:
+        with socket.create_connection((host, port), timeout=1) as s:
+            s.settimeout(None)  # Checking a whole book takes a while
+            s.sendall(json.dumps(message).encode("utf-8") + b"\n")
+            with s.makefile("rb") as reply:
+                return json.loads(reply.readline())
+    except (OSError, ValueError):  # Server stopped or failed
+        return None
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    reply = request(args)
+    if reply is None or not reply["served"]:
+        import tools
+
+        sys.argv = ["mt", "--no-clear", *args]
+        tools.main()
+        return
+    sys.stdout.write(reply["output"])
+    sys.exit(reply["exit_code"])
@@ -1,9 +1,14 @@
 # compare_strings.py
 import difflib
+import os
+from bisect import bisect_left
 from pathlib import Path
 from enum import Enum
 from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable, Dict, Iterator, List, Tuple
 from markdown_tools.markdown_file import MarkdownFile
+from . import records
 from .console import console
 from rich.panel import Panel, Text
 
@@ -17,7 +22,19 @@ class DiffResult(Enum):
 @dataclass
 class CompareResult:
     result: DiffResult
-    diffs: list[str]
+    str1: str
+    str2: str
+
+    @cached_property
+    def edits(self) -> list[str]:
+        "The diff engine's lines; only created if they're used"
+        a, b = self.str1.splitlines(), self.str2.splitlines()
+        return list(diff_engine()(a, b))
+
+    @cached_property
+    def diffs(self) -> list[str]:
+        "Only created if the differences are displayed"
+        return number_diffs(self.edits)
 
     def show_diffs(self, md_file: MarkdownFile) -> None:
         md_file.display_name_once()
@@ -30,6 +47,26 @@ class CompareResult:
             )
         )
 
+    def record(self, md: Path, line: int, source: Path) -> None:
+        """
+        Emit a jsonl `diff` record for the listing at `line` of md,
+        with the numbers of changed lines
+        """
+        added = removed = 0
+        if self.result != DiffResult.NONE:
+            for edit in self.edits:
+                added += edit.startswith("+ ")
+                removed += edit.startswith("- ")
+        records.emit(
+            "diff",
+            file=md,
+            line=line,
+            source=source,
+            status=self.result.name.lower(),
+            added=added,
+            removed=removed,
+        )
+
     def show_result(self, path: Path) -> None:
         console.print(
             Panel(
@@ -42,22 +79,199 @@ class CompareResult:
 
 
 def only_differs_by_blank_lines(str1: str, str2: str) -> bool:
-    def no_blank_lines(with_blanks: str) -> list[str]:
-        return [
+    def no_blank_lines(with_blanks: str) -> tuple[str, ...]:
+        return tuple(
             line
             for line in with_blanks.splitlines(True)
             if line.strip()
-        ]
+        )
 
     return no_blank_lines(str1) == no_blank_lines(str2)
 
 
+# Diff engines produce lines in difflib.Differ format:
+# "  " (both), "- " (first only) or "+ " (second only) + the line.
+# Differ also produces "? " hint lines, which are ignored.
+DiffEngine = Callable[[List[str], List[str]], Iterator[str]]
+
+
+def differ_diff(a: List[str], b: List[str]) -> Iterator[str]:
+    "Fuzzy matching of similar lines; slow on long inputs"
+    return difflib.Differ().compare(a, b)
+
+
+def myers_diff(a: List[str], b: List[str]) -> Iterator[str]:
+    """
+    Eugene Myers' O((N+M)D) shortest edit script, where D is the
+    number of differing lines: fast when the inputs are mostly equal.
+    """
+    n, m = len(a), len(b)
+    offset = n + m + 1
+    # v[k + offset]: furthest x reached on diagonal k = x - y
+    v = [0] * (2 * offset + 1)
+    # trace[d][k + d + 1]: v before step d, for diagonals -d-1..d+1
+    trace: List[List[int]] = []
+    for d in range(n + m + 1):
+        trace.append(v[offset - d - 1 : offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            down = v[offset + k + 1]  # Insert from b
+            right = v[offset + k - 1] + 1  # Delete from a
+            if k == -d or (k != d and right <= down):
+                x = down
+            else:
+                x = right
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x, y = x + 1, y + 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                break
+        else:
+            continue
+        break
+    # Walk back from the end to recover the edits:
+    edits: List[str] = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        previous = trace[d]
+        k = x - y
+        if k == -d or (
+            k != d and previous[k + d] < previous[k + d + 2]
+        ):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = previous[previous_k + d + 1]
+        previous_y = previous_x - previous_k
+        while x > previous_x and y > previous_y:
+            edits.append(f"  {a[x - 1]}")
+            x, y = x - 1, y - 1
+        if d > 0:
+            if x == previous_x:
+                edits.append(f"+ {b[y - 1]}")
+            else:
+                edits.append(f"- {a[x - 1]}")
+        x, y = previous_x, previous_y
+    return reversed(edits)
+
+
+def _unique_matches(
+    a: List[str], b: List[str]
+) -> List[Tuple[int, int]]:
+    """
+    Longest increasing sequence of (i, j) where a[i] == b[j] and the
+    line appears exactly once in each of a and b.
+    """
+    counts: Dict[str, List[int]] = {}  # line -> [count a, count b, j]
+    for line in a:
+        counts.setdefault(line, [0, 0, 0])[0] += 1
+    for j, line in enumerate(b):
+        if line in counts:
+            count = counts[line]
+            count[1] += 1
+            count[2] = j
+    pairs = [
+        (i, counts[line][2])
+        for i, line in enumerate(a)
+        if counts[line][:2] == [1, 1]
+    ]
+    # Patience sort on j, keeping a back pointer for each pair:
+    # tops[n]: smallest j ending an increasing sequence of length n+1
+    tops: List[int] = []
+    top_pairs: List[int] = []
+    back: List[int] = []
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect_left(tops, j)
+        back.append(top_pairs[pile - 1] if pile else -1)
+        if pile == len(tops):
+            tops.append(j)
+            top_pairs.append(index)
+        else:
+            tops[pile] = j
+            top_pairs[pile] = index
+    matches: List[Tuple[int, int]] = []
+    index = top_pairs[-1] if top_pairs else -1
+    while index >= 0:
+        matches.append(pairs[index])
+        index = back[index]
+    return matches[::-1]
+
+
+def patience_diff(a: List[str], b: List[str]) -> Iterator[str]:
+    """
+    Anchors the diff on lines that are unique in both inputs, then
+    diffs the gaps between them. Keeps moved and repeated lines such
+    as braces from being matched out of place.
+    """
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        yield f"  {a[start]}"
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while (
+        end_a > start
+        and end_b > start
+        and a[end_a - 1] == b[end_b - 1]
+    ):
+        end_a, end_b = end_a - 1, end_b - 1
+    a_gap, b_gap = a[start:end_a], b[start:end_b]
+    matches = _unique_matches(a_gap, b_gap)
+    if not matches and set(a_gap).isdisjoint(b_gap):
+        # A replaced block: nothing to align
+        yield from (f"- {line}" for line in a_gap)
+        yield from (f"+ {line}" for line in b_gap)
+    elif not matches:
+        yield from myers_diff(a_gap, b_gap)
+    else:
+        i0 = j0 = 0
+        for i, j in matches:
+            yield from patience_diff(a_gap[i0:i], b_gap[j0:j])
+            yield f"  {a_gap[i]}"
+            i0, j0 = i + 1, j + 1
+        yield from patience_diff(a_gap[i0:], b_gap[j0:])
+    for line in a[end_a:]:
+        yield f"  {line}"
+
+
+def auto_diff(a: List[str], b: List[str]) -> Iterator[str]:
+    "difflib for ordinary listings, patience for long ones"
+    if max(len(a), len(b)) <= AUTO_DIFFER_LINES:
+        return differ_diff(a, b)
+    return patience_diff(a, b)
+
+
+AUTO_DIFFER_LINES = 500
+
+DIFF_ENGINES: Dict[str, DiffEngine] = {
+    "auto": auto_diff,
+    "difflib": differ_diff,
+    "myers": myers_diff,
+    "patience": patience_diff,
+}
+
+
+def set_diff_engine(name: str) -> None:
+    "Stored in the environment so worker processes inherit it"
+    if name not in DIFF_ENGINES:
+        engines = ", ".join(DIFF_ENGINES)
+        raise ValueError(f"Unknown diff engine {name}: use {engines}")
+    os.environ["MT_DIFF_ENGINE"] = name
+
+
+def diff_engine() -> DiffEngine:
+    return DIFF_ENGINES[os.environ.get("MT_DIFF_ENGINE", "auto")]
+
+
 def create_diffs(str1: str, str2: str) -> list[str]:
+    return number_diffs(
+        list(diff_engine()(str1.splitlines(), str2.splitlines()))
+    )
+
+
+def number_diffs(diffs: list[str]) -> list[str]:
+    "Adds the line numbers in each string to diff engine lines"
     differences: list[str] = []
     n1, n2 = 1, 1
-    diffs = list(
-        difflib.Differ().compare(str1.splitlines(), str2.splitlines())
-    )
     for line in diffs:
         if line.startswith("  "):
             # Line present in both strings
@@ -80,12 +294,11 @@ def create_diffs(str1: str, str2: str) -> list[str]:
 
 
 def compare_strings(str1: str, str2: str) -> CompareResult:
-    diffs = create_diffs(str1, str2)
-
+    # The diffs are only created if CompareResult.diffs is used
     if str1 == str2:
-        return CompareResult(DiffResult.NONE, diffs)
+        return CompareResult(DiffResult.NONE, str1, str2)
 
     if only_differs_by_blank_lines(str1, str2):
-        return CompareResult(DiffResult.BLANK_LINES, diffs)
+        return CompareResult(DiffResult.BLANK_LINES, str1, str2)
 
-    return CompareResult(DiffResult.CONTENT, diffs)
+    return CompareResult(DiffResult.CONTENT, str1, str2)
@@ -1,27 +1,46 @@
 # display_comments.py
 from pathlib import Path
+from markdown_tools import records
 from markdown_tools.markdown_file import (
     MarkdownFile,
     Comment,
     CodePath,
+    line_numbers,
 )
 from rich.panel import Panel
 from rich.console import group
 from markdown_tools.console import console
 
 
-def display_markdown_comments(md: Path):
+def display_markdown_comments(
+    md: Path, md_file: MarkdownFile | None = None
+):
+    "md_file: md, if it's already parsed"
+    # An empty MarkdownFile is false, so compare with None:
+    parts = (
+        MarkdownFile.iter_parts(md) if md_file is None else md_file
+    )
+    if records.json_lines():
+        for line, part in line_numbers(parts):
+            if isinstance(part, (Comment, CodePath)):
+                records.emit(
+                    "comment",
+                    file=md,
+                    line=line,
+                    path=getattr(part, "path", None),
+                    url=getattr(part, "url", None),
+                )
+        return
+
     @group()
-    def parts():
-        for comment in MarkdownFile(md).comments():
-            assert isinstance(comment, Comment) or isinstance(
-                comment, CodePath
-            )
-            yield comment
+    def comments():
+        for part in parts:
+            if isinstance(part, (Comment, CodePath)):
+                yield part
 
     console.print(
         Panel(
-            parts(),
+            comments(),
             title=f"{md}",
             border_style="yellow",
             title_align="left",
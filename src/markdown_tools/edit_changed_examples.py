@@ -1,33 +1,59 @@
 # edit_changed_examples.py
 """
-Creates and updates file_edit_script which opens files with content
-differences inside VSCode.
+Finds source code files with content differences, so they can be
+added to the file_edit_script which opens them inside VSCode.
 """
 from pathlib import Path
+from typing import List
 from markdown_tools.markdown_file import (
     MarkdownFile,
     SourceCode,
     check,
+    line_numbers,
 )
-from markdown_tools.compare_strings import compare_strings, DiffResult
-from markdown_tools.vscode_open import vscode_open
+from markdown_tools import records
+from markdown_tools.compare_strings import (
+    compare_strings,
+    CompareResult,
+    DiffResult,
+)
+from markdown_tools.source_reader import listings_with_sources
 
 
-def edit_example_changes(md: Path, file_edit_script: Path) -> None:
+def edit_example_changes(
+    md: Path, source: Path | None = None
+) -> List[Path]:
+    """
+    Returns the source files whose content differs from md.
+    source: only compare the listings taken from this file.
+    """
     md_file = MarkdownFile(md)
-    for (
-        code_path,
-        example_code,
-    ) in md_file.code_path_and_example_code():
-        full_path = Path(code_path.path) / Path(  # type: ignore
-            example_code.source_file_name
-        )
+    json_lines = records.json_lines()
+    lines = (  # Of each listing, for the records
+        {id(part): line for line, part in line_numbers(md_file)}
+        if json_lines
+        else {}
+    )
+    changed: List[Path] = []
+    for example_code, full_path, text in listings_with_sources(
+        md_file, source
+    ):
+        if text == example_code.code:  # Matches; no need to compare
+            if json_lines:
+                CompareResult(DiffResult.NONE, text, text).record(
+                    md, lines[id(example_code)], full_path
+                )
+            continue
         check.is_true(
-            full_path.exists(),
+            text is not None or full_path.exists(),
             f"{full_path.as_posix()} does not exist",
         )
-        source_file = SourceCode.from_source_file(full_path)
+        source_file = SourceCode.from_source_file(full_path, text)
         diff = compare_strings(example_code.code, source_file.code)
+        if json_lines:
+            diff.record(md, lines[id(example_code)], full_path)
         if diff.result == DiffResult.CONTENT:
-            diff.show_diffs(md_file)
-            vscode_open(file_edit_script, full_path)
+            if not json_lines:
+                diff.show_diffs(md_file)
+            changed.append(full_path)
+    return changed
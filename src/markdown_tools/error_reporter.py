@@ -1,20 +1,148 @@
 from pathlib import Path
-from typing import Any, Callable, List, NoReturn
+from typing import Any, Callable, Deque, Dict, List, NoReturn, Tuple
 from functools import wraps
+from collections import deque
+from enum import Enum
+from types import ModuleType
+import os
 import sys
+from . import records
 from .console import console
 from dataclasses import dataclass
 
 
+class TraceMode(Enum):
+    OFF = "off"  # No wrappers are installed
+    ON = "on"  # Record every call, keep the last TRACE_CAPACITY
+    SAMPLE = "sample"  # Record every Nth call
+    RING = "ring"  # Record every call, keep only the last N
+
+
+# A recorded call: (self or None, function name, args, kwargs).
+# Holds references only; it is turned into a string by str(check).
+Frame = Tuple[Any, str, tuple, Dict[str, Any]]
+
+
+def format_frame(frame: Frame) -> str:
+    instance, name, args, kwargs = frame
+    arg_str = ", ".join(map(str, args)) + ", ".join(
+        f"{k}={v}" for k, v in kwargs.items()
+    )
+    if instance is not None:
+        name = f"{instance.__class__.__name__}.{name}"
+    return f"{name}({arg_str})"
+
+
+class CheckFailure(Exception):
+    """
+    Raised by check.error() with --keep-going, and caught for each
+    file so the run can continue. It holds the formatted report, as
+    the call trace is lost once the exception leaves the process.
+    """
+
+    def __init__(
+        self, file: Path | None, line: int, message: str, report: str
+    ) -> None:
+        super().__init__(file, line, message, report)  # For pickle
+        self.file = file
+        self.line = line
+        self.message = message
+        self.report = report
+
+    def display(self) -> None:
+        if records.json_lines():
+            records.emit(
+                "error",
+                file=self.file,
+                line=self.line,
+                message=self.message,
+            )
+        else:
+            console.print(self.report)
+
+
+def keep_going() -> bool:
+    "Set by --keep-going, or MT_KEEP_GOING=1/true/yes/on"
+    value = os.environ.get("MT_KEEP_GOING", "").strip().lower()
+    return value in ("1", "true", "t", "yes", "y", "on")
+
+
+def set_keep_going(keep: bool) -> None:
+    "Stored in the environment so worker processes inherit it"
+    if keep:
+        os.environ["MT_KEEP_GOING"] = "1"
+    else:
+        os.environ.pop("MT_KEEP_GOING", None)
+
+
+def collect(processor: Callable[..., Any], md: Path, *args) -> Any:
+    "processor(md, *args), or the CheckFailure it raised"
+    check.start_file(md)
+    try:
+        return processor(md, *args)
+    except CheckFailure as failure:
+        return failure
+
+
+def report_failures(failures: List[CheckFailure]) -> None:
+    "The single report at the end of a --keep-going run"
+    for failure in failures:
+        failure.display()
+    if not records.json_lines():
+        console.print(
+            f"[bold red]{len(failures)} file(s) failed[/bold red]"
+        )
+
+
 class _ErrorReporter:
+    TRACE_CAPACITY = 500  # Frames kept by "on" and "sample" modes
+
     def __init__(self) -> None:
-        self.trace: List[str] = []
-        self.input_file: Path | None = None
+        self.trace: Deque[Frame] = deque(maxlen=self.TRACE_CAPACITY)
+        self.trace_mode = TraceMode.OFF
+        self.sample_rate: int = 1
+        self.call_count: int = 0
+        self._input_file: Path | None = None
         self.current_line_number: int = 0
         self.current_line: str = ""
 
-    def track(self, message: str) -> None:
-        self.trace.append(message)
+    @property
+    def input_file(self) -> Path | None:
+        return self._input_file
+
+    @input_file.setter
+    def input_file(self, input_file: Path | None) -> None:
+        # The line only describes the file being processed:
+        if input_file != self._input_file:
+            self.current_line_number = 0
+            self.current_line = ""
+        self._input_file = input_file
+
+    def start_file(self, input_file: Path) -> None:
+        """
+        Forget the last file's trace and line before input_file is
+        entered, so the trace keeps the calls that opened it.
+        """
+        self.trace.clear()
+        self.current_line_number = 0
+        self.current_line = ""
+        self._input_file = input_file
+
+    def set_trace_mode(self, mode: TraceMode, n: int = 0) -> None:
+        self.trace_mode = mode
+        self.sample_rate = n if mode == TraceMode.SAMPLE else 1
+        self.call_count = 0
+        self.trace = deque(
+            maxlen=n if mode == TraceMode.RING else self.TRACE_CAPACITY
+        )
+
+    def sampled(self) -> bool:
+        "Should the current call be recorded?"
+        self.call_count += 1
+        return self.call_count % self.sample_rate == 0
+
+    def track(self, frame: Frame) -> None:
+        self.trace.append(frame)
 
     def __str__(self) -> str:
         parts = []
@@ -28,7 +156,9 @@ class _ErrorReporter:
         if self.current_line:
             parts.append(f"Line: {self.current_line}")
 
-        parts.extend(self.trace)
+        if self.trace_mode == TraceMode.OFF:
+            parts.append("(Call trace is off: use --trace on)")
+        parts.extend(map(format_frame, self.trace))
         return "\n".join(parts)
 
     def __rich__(self) -> str:
@@ -41,7 +171,15 @@ class _ErrorReporter:
         )
 
     def error(self, msg: str) -> NoReturn:
-        console.print(self.format(msg))
+        failure = CheckFailure(
+            self.input_file,
+            self.current_line_number,
+            msg.strip(),
+            self.format(msg),
+        )
+        if keep_going():
+            raise failure
+        failure.display()
         sys.exit(1)
 
     def is_true(self, condition: bool, msg: str) -> None:
@@ -52,49 +190,123 @@ class _ErrorReporter:
 check = _ErrorReporter()
 
 
-# Decorator for standalone functions
+# Decorator for standalone (module-level) functions. Like a method,
+# func is only wrapped while tracing is on:
 def call_track(func: Callable) -> Callable:
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        arg_str = ", ".join(map(str, args)) + ", ".join(
-            f"{k}={v}" for k, v in kwargs.items()
-        )
-        check.track(f"{func.__name__}({arg_str})")
-        # Call the original function
-        return func(*args, **kwargs)
-
-    return wrapper
+    module = sys.modules[func.__module__]
+    CallTracker.functions.append((module, func.__name__, func))
+    if CallTracker.enabled:
+        return CallTracker.track_function(func)
+    return func
 
 
 # Metaclass to track method calls in classes
 class CallTracker(type):
+    # Every (class, method name, original method) seen, so tracing
+    # can be switched on and off after the classes are created:
+    methods: List[Tuple[type, str, Callable]] = []
+    # And every (module, name, function) decorated with @call_track:
+    functions: List[Tuple[ModuleType, str, Callable]] = []
+    enabled: bool = False
+
     def __new__(
         cls, name: str, bases: tuple[type, ...], dct: dict[str, Any]
     ):
-        # Wrap each method with a logging wrapper
+        new_class = super().__new__(cls, name, bases, dct)
+        # @dataclass(slots=True) creates the class again from the
+        # first one's dict: forget the first and unwrap its methods:
+        CallTracker.methods = [
+            entry
+            for entry in CallTracker.methods
+            if (entry[0].__module__, entry[0].__qualname__)
+            != (new_class.__module__, new_class.__qualname__)
+        ]
         for attr_name, attr_value in dct.items():
+            attr_value = getattr(
+                attr_value, "tracked_method", attr_value
+            )
             if callable(attr_value):
-                dct[attr_name] = cls.track_method(
-                    attr_name, attr_value
+                CallTracker.methods.append(
+                    (new_class, attr_name, attr_value)
                 )
-        return super().__new__(cls, name, bases, dct)
+                if CallTracker.enabled:
+                    setattr(
+                        new_class,
+                        attr_name,
+                        cls.track_method(attr_name, attr_value),
+                    )
+        return new_class
 
     @staticmethod
-    def track_method(method_name: str, method: Callable) -> Callable:
-        def wrapper(self, *args, **kwargs):
-            arg_str = ", ".join(map(str, args)) + ", ".join(
-                f"{k}={v}" for k, v in kwargs.items()
+    def enable(enabled: bool) -> None:
+        "Install (or remove) the logging wrapper on every method"
+        if enabled == CallTracker.enabled:
+            return
+        CallTracker.enabled = enabled
+        for tracked_class, method_name, method in CallTracker.methods:
+            setattr(
+                tracked_class,
+                method_name,
+                CallTracker.track_method(method_name, method)
+                if enabled
+                else method,
             )
-            check.track(
-                f"{self.__class__.__name__}.{method_name}({arg_str})"
+        for module, function_name, function in CallTracker.functions:
+            setattr(
+                module,
+                function_name,
+                CallTracker.track_function(function)
+                if enabled
+                else function,
             )
+
+    @staticmethod
+    def track_method(method_name: str, method: Callable) -> Callable:
+        def wrapper(self, *args, **kwargs):
+            if check.sampled():
+                check.track((self, method_name, args, kwargs))
             # Call the original method
             return method(self, *args, **kwargs)
 
+        wrapper.tracked_method = method  # type: ignore[attr-defined]
         return wrapper
 
+    @staticmethod
+    def track_function(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if check.sampled():
+                check.track((None, function.__name__, args, kwargs))
+            # Call the original function
+            return function(*args, **kwargs)
+
+        return wrapper
+
+
+def set_trace_mode(spec: str) -> None:
+    """
+    Configure call tracing from "off", "on", "sample:N" or "ring:N".
+    The spec is also stored in the MT_TRACE environment variable so
+    worker processes start with the same mode.
+    """
+    name, _, count = spec.partition(":")
+    try:
+        mode = TraceMode(name)
+        n = int(count) if count else 0
+    except ValueError:
+        raise ValueError(f"Invalid trace mode: {spec}")
+    if mode in (TraceMode.SAMPLE, TraceMode.RING) and n < 1:
+        raise ValueError(f"{spec}: use {name}:N with N > 0")
+    check.set_trace_mode(mode, n)
+    CallTracker.enable(mode != TraceMode.OFF)
+    os.environ["MT_TRACE"] = spec
+
+
+set_trace_mode(os.environ.get("MT_TRACE", TraceMode.OFF.value))
+
 
 if __name__ == "__main__":
+    set_trace_mode(TraceMode.ON.value)
 
     @call_track
     def some_function(a, b):
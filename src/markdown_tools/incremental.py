@@ -0,0 +1,127 @@
+# incremental.py
+"""
+Remembers which Markdown files a command processed cleanly, together
+with the source files their listings were taken from. On the next run
+with --changed, the command skips every file where neither the
+Markdown nor any of those source files has changed.
+"""
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from . import cache
+from .console import console
+from .markdown_file import CodePath, MarkdownFile, SourceCode
+
+STATE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FileStamp:
+    size: int
+    mtime_ns: int
+    digest: bytes
+
+    @staticmethod
+    def of(path: Path) -> "FileStamp | None":
+        "None if path doesn't exist"
+        try:
+            stat = path.stat()
+            data = path.read_bytes()
+        except OSError:
+            return None
+        return FileStamp(
+            stat.st_size,
+            stat.st_mtime_ns,
+            hashlib.blake2b(data, digest_size=16).digest(),
+        )
+
+    def matches(self, path: Path) -> bool:
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        if (stat.st_size, stat.st_mtime_ns) == (
+            self.size,
+            self.mtime_ns,
+        ):
+            return True
+        current = FileStamp.of(path)  # Touched, maybe not changed
+        return current is not None and current.digest == self.digest
+
+
+def source_files(md_file: MarkdownFile) -> List[Path]:
+    """
+    The source files for md_file's listings. Unlike
+    code_path_and_example_code() this skips listings without a
+    CodePath, as some commands don't require one.
+    """
+    sources: List[Path] = []
+    code_path: CodePath | None = None
+    for part in md_file:
+        if isinstance(part, CodePath):
+            code_path = part
+        elif (
+            isinstance(part, SourceCode)
+            and part.source_file_name
+            and code_path is not None
+            and code_path.path is not None
+        ):
+            sources.append(
+                Path(code_path.path) / part.source_file_name
+            )
+    return sources
+
+
+Stamps = Tuple[FileStamp | None, Dict[str, FileStamp | None]]
+
+
+class RunState:
+    "The Markdown files that `processor` last found clean"
+
+    def __init__(self, processor: Callable) -> None:
+        command = f"{processor.__module__}.{processor.__qualname__}"
+        self.cache_file = cache.cache_file("state", command)
+        self.files: Dict[str, Stamps] = (
+            cache.load(self.cache_file, STATE_VERSION) or {}
+        )
+
+    def unchanged(self, md: Path) -> bool:
+        key = md.absolute().as_posix()
+        if key not in self.files:
+            return False
+        md_stamp, sources = self.files[key]
+
+        def same(stamp: FileStamp | None, path: Path) -> bool:
+            if stamp is None:
+                return not path.exists()
+            return stamp.matches(path)
+
+        return same(md_stamp, md) and all(
+            same(stamp, Path(source))
+            for source, stamp in sources.items()
+        )
+
+    def changed(self, files: List[Path]) -> List[Path]:
+        "The files that need processing"
+        changed = [md for md in files if not self.unchanged(md)]
+        if skipped := len(files) - len(changed):
+            console.print(f"Skipping {skipped} unchanged file(s)")
+        return changed
+
+    def update(self, md: Path, clean: bool) -> None:
+        "Record md if it was processed cleanly, otherwise forget it"
+        key = md.absolute().as_posix()
+        if not clean:
+            self.files.pop(key, None)
+            return
+        self.files[key] = (
+            FileStamp.of(md),
+            {
+                source.as_posix(): FileStamp.of(source)
+                for source in source_files(MarkdownFile(md))
+            },
+        )
+
+    def save(self) -> None:
+        cache.save(self.cache_file, STATE_VERSION, self.files)
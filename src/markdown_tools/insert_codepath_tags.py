@@ -1,13 +1,32 @@
 #: insert_codepath_tags.py
 from pathlib import Path
-from .markdown_file import MarkdownFile, CodePath, SourceCode
+from . import records
+from .markdown_file import (
+    MarkdownFile,
+    CodePath,
+    SourceCode,
+    display_file_name,
+    line_numbers,
+)
 from .console import console
 
 
-def validate_codepath_tags(md: Path):
-    md_file = MarkdownFile(md)
+def validate_codepath_tags(
+    md: Path, md_file: MarkdownFile | None = None
+) -> int:
+    """
+    Returns the number of listings that failed validation.
+    md_file: md, if it's already parsed.
+    """
+    # An empty MarkdownFile is false, so compare with None:
+    parts = (
+        MarkdownFile.iter_parts(md) if md_file is None else md_file
+    )
+    json_lines = records.json_lines()
     code_path: CodePath | None = None
-    for part in md_file:
+    failures = 0
+    name_displayed = False
+    for line, part in line_numbers(parts):
         if isinstance(part, CodePath):
             code_path = part  # Most recent CodePath
         if (
@@ -15,14 +34,32 @@ def validate_codepath_tags(md: Path):
             and not part.language_name == "text"
             and not part.ignore
         ):
-            md_file.display_name_once()
+            if not json_lines and not name_displayed:
+                display_file_name(md)
+                name_displayed = True
             if code_path is None:
+                status = "missing"
+            elif code_path.validate(part):
+                status = "valid"
+            else:
+                status = "invalid"
+            if status != "valid":
+                failures += 1
+            if json_lines:
+                records.emit(
+                    "codepath",
+                    file=md,
+                    line=line,
+                    listing=part.source_file_name,
+                    path=code_path.path if code_path else None,
+                    status=status,
+                )
+            elif code_path is None:
                 console.print(
                     "[FAILED] validate_codepath_tags(): "
                     f"{part.source_file_name} appeared before CodePath"
                 )
-                continue
-            if code_path.validate(part):
+            elif status == "valid":
                 console.print(
                     f"Validated {code_path.path} -> {part.source_file_name}"
                 )
@@ -30,33 +67,67 @@ def validate_codepath_tags(md: Path):
                 console.print(
                     f"Invalid: {part.source_file_name} under {code_path.path}"
                 )
+    return failures
 
 
-def insert_codepath_tags(md: Path):
+def insert_codepath_tags(md: Path, dry_run: bool = False):
+    """
+    The file is written once, after every missing CodePath is found.
+    dry_run: show the insertions without making them.
+    """
     md_file = MarkdownFile(md)
+    json_lines = records.json_lines()
+    lines = (  # Of each listing, for the records
+        {id(part): line for line, part in line_numbers(md_file)}
+        if json_lines
+        else {}
+    )
     code_path: CodePath | None = None
     md_file.display_name_once()
     tmp_file = md_file.file_path.with_suffix(".tmp.md")
     if tmp_file.exists():
-        console.print(f"Deleting: {tmp_file}")
-        tmp_file.unlink()
+        if dry_run:
+            console.print(f"Would delete: {tmp_file}")
+        else:
+            console.print(f"Deleting: {tmp_file}")
+            tmp_file.unlink()
     for part in md_file:
         if isinstance(part, CodePath):
             code_path = part  # Most recent CodePath
-            continue
-        if (
+        elif (
             isinstance(part, SourceCode)
             and part.language_name != "text"
             and not part.ignore
         ):
             source_code: SourceCode = part
             if code_path and code_path.validate(source_code):
-                console.print(
-                    f"Validated {code_path.path} -> {source_code.source_file_name}"
-                )
+                if json_lines:
+                    records.emit(
+                        "codepath",
+                        file=md,
+                        line=lines[id(source_code)],
+                        listing=source_code.source_file_name,
+                        path=code_path.path,
+                        status="valid",
+                    )
+                else:
+                    console.print(
+                        f"Validated {code_path.path} -> {source_code.source_file_name}"
+                    )
             else:  # code_path is None or didn't validate.
                 # Insert a new one before source_code
                 code_path = CodePath.new_based_on(source_code)
-                idx = md_file.index_of(source_code)
-                md_file.insert(idx, code_path)
-                md_file.write_new_file(md_file.file_path)
+                md_file.plan_insert(source_code, code_path)
+                if json_lines:
+                    records.emit(
+                        "insert",
+                        file=md,
+                        line=lines[id(source_code)],
+                        listing=source_code.source_file_name,
+                        path=code_path.path,
+                        inserted=not dry_run,
+                    )
+    if dry_run:
+        md_file.show_edits()
+    else:
+        md_file.commit_edits()
@@ -1,6 +1,29 @@
 #: languages.py
-from typing import List
-from dataclasses import dataclass
+"""
+The languages that code listings can use. LANGUAGES finds a language
+by its name, an alias or its file extension with one dictionary
+lookup. Entries in the languages file (see config_file()) are added
+to the built-in languages when this module is first imported; an entry
+with the name of a built-in language changes only the fields it gives.
+For example:
+
+[
+    {"language": "python", "start_search": "/home/me/python-book"},
+    {
+        "language": "kotlin",
+        "file_extension": ".kt",
+        "comment_symbol": "//",
+        "start_search": "/home/me/kotlin-book",
+        "aliases": ["kt"]
+    }
+]
+"""
+import json
+import os
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from .error_reporter import check
 
 
 @dataclass(frozen=True)
@@ -10,40 +33,124 @@ class LanguageInfo:
     comment_symbol: str
     start_search: str
     source_file_name_required: bool = True
+    aliases: Tuple[str, ...] = ()
+
+    def keys(self) -> Tuple[str, ...]:
+        "Everything this language can be looked up by"
+        return (self.language, self.file_extension, *self.aliases)
 
 
 _languages: List[LanguageInfo] = [
-    LanguageInfo("python", ".py", "#", "C:/git/python-experiments"),
-    LanguageInfo("rust", ".rs", "//", "C:/git/rust-experiments"),
+    LanguageInfo(
+        "python",
+        ".py",
+        "#",
+        "C:/git/python-experiments",
+        aliases=("py",),
+    ),
+    LanguageInfo(
+        "rust",
+        ".rs",
+        "//",
+        "C:/git/rust-experiments",
+        aliases=("rs",),
+    ),
     LanguageInfo("go", ".go", "//", "C:/git/go-experiments"),
     LanguageInfo("text", ".txt", "", "", False),
 ]
 
 
-@dataclass(frozen=True)
 class Languages:
-    languages: List[LanguageInfo]
+    def __init__(self, languages: List[LanguageInfo]) -> None:
+        self.languages: List[LanguageInfo] = []
+        self.by_key: Dict[str, LanguageInfo] = {}
+        for language_info in languages:
+            self.register(language_info)
+
+    def register(self, language_info: LanguageInfo) -> None:
+        "Add a language, or replace the one with the same name"
+        name = language_info.language
+        if name in self.by_key and self.by_key[name].language == name:
+            old = self.by_key[name]
+            self.languages.remove(old)
+            for key in old.keys():
+                del self.by_key[key]
+        for key in language_info.keys():
+            check.is_true(
+                bool(key) and key not in self.by_key,
+                f"{language_info.language}: '{key}' is empty or"
+                + " already used by another language",
+            )
+        self.languages.append(language_info)
+        for key in language_info.keys():
+            self.by_key[key] = language_info
 
     def __getitem__(self, key: str) -> LanguageInfo:
-        for language_info in self.languages:
-            if (
-                key == language_info.language
-                or key == language_info.file_extension
-            ):
-                return language_info
-        raise KeyError(f"No LanguageInfo found for key: {key}")
+        try:
+            return self.by_key[key]
+        except KeyError:
+            raise KeyError(f"No LanguageInfo found for key: {key}")
 
     def __contains__(self, key: str) -> bool:
-        return any(
-            key in (lang.language, lang.file_extension)
-            for lang in self.languages
+        return key in self.by_key
+
+
+def config_file() -> Path:
+    "~/.config/markdown_tools/languages.json, or MT_LANGUAGES"
+    default = Path.home() / ".config" / "markdown_tools"
+    return Path(
+        os.environ.get("MT_LANGUAGES", default / "languages.json")
+    )
+
+
+def _from_config(
+    entry: Dict[str, Any], languages: Languages, config: Path
+) -> LanguageInfo:
+    names = {field.name for field in fields(LanguageInfo)}
+    check.is_true(
+        isinstance(entry, dict)
+        and isinstance(entry.get("language"), str)
+        and entry.keys() <= names,
+        f"Each entry in {config} needs a 'language'"
+        + f" and may only contain: {', '.join(sorted(names))}",
+    )
+    if "aliases" in entry:
+        check.is_true(
+            isinstance(entry["aliases"], list),
+            f"{config}: 'aliases' must be a list",
         )
+        entry = {**entry, "aliases": tuple(entry["aliases"])}
+    name = entry["language"]
+    if name in languages and languages[name].language == name:
+        return replace(languages[name], **entry)
+    try:
+        return LanguageInfo(**entry)
+    except TypeError as e:
+        check.error(f"{config}: {e}")
+
+
+def load_languages(config: Path) -> Languages:
+    "The built-in languages, with the changes and additions in config"
+    languages = Languages(_languages)
+    if not config.is_file():
+        return languages
+    try:
+        entries = json.loads(config.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        check.error(f"Can't read {config}: {e}")
+    check.is_true(
+        isinstance(entries, list), f"{config} must contain a list"
+    )
+    for entry in entries:
+        languages.register(_from_config(entry, languages, config))
+    return languages
 
 
-LANGUAGES = Languages(_languages)  # Singleton
+LANGUAGES = load_languages(config_file())  # Singleton
 
 if __name__ == "__main__":
     print(LANGUAGES["python"])  # Index by language name
     print(LANGUAGES[".py"])  # Index by file extension
+    print(LANGUAGES["py"])  # Index by alias
     print("python" in LANGUAGES)
     print(".py" in LANGUAGES)
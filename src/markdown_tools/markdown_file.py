@@ -1,8 +1,31 @@
 #: markdown_file.py
+import os
+import sys
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterator, List, Tuple, Union, TypeAlias
+from typing import (
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    TextIO,
+    Tuple,
+    Union,
+    TypeAlias,
+)
 from .languages import LanguageInfo, LANGUAGES
+from .tokenizer import (
+    Kind,
+    tokenize,
+    last_line_start,
+    line_breaks,
+    line_end,
+)
+from .source_index import SourceIndex, source_index
+from . import parse_cache
 from .console import console
 from .error_reporter import check, CallTracker
 from rich.panel import Panel
@@ -22,27 +45,41 @@ class MarkdownScanner(metaclass=CallTracker):
 
     file_path: Path
     original_markdown: str = ""
-    lines: List[str] = field(default_factory=list)
     current_line_number: int = 0
+    # Split from original_markdown on first use:
+    _lines: List[str] | None = field(default=None, repr=False)
 
     def __post_init__(self):
-        check.is_true(
-            self.file_path.exists(),
-            f"{self.file_path} does not exist",
+        MarkdownScanner.check_file(self.file_path)
+        self.original_markdown = self.file_path.read_text(
+            encoding="utf-8"
         )
+
+    @staticmethod
+    def check_file(file_path: Path) -> None:
         check.is_true(
-            not self.file_path.is_dir(),
-            f"{self.file_path} is a directory",
+            file_path.exists(),
+            f"{file_path} does not exist",
         )
         check.is_true(
-            self.file_path.suffix == ".md",
-            f"{self.file_path} does not end with '.md'",
+            not file_path.is_dir(),
+            f"{file_path} is a directory",
         )
-        check.input_file = self.file_path
-        self.original_markdown = self.file_path.read_text(
-            encoding="utf-8"
+        check.is_true(
+            file_path.suffix == ".md",
+            f"{file_path} does not end with '.md'",
         )
-        self.lines = self.original_markdown.splitlines(True)
+        check.input_file = file_path
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.original_markdown.splitlines(True)
+        return self._lines
+
+    @lines.setter
+    def lines(self, lines: List[str]) -> None:
+        self._lines = lines
 
     def __iter__(self):
         return self
@@ -69,7 +106,45 @@ class MarkdownScanner(metaclass=CallTracker):
         return self.lines[self.current_line_number]
 
 
-@dataclass
+class StreamingScanner(MarkdownScanner):
+    """
+    A MarkdownScanner that reads each line from `file` when it's
+    needed, rather than reading the whole file first. readline()
+    only ends lines at "\n", so each one is split again the way
+    splitlines() splits the whole file for MarkdownScanner.
+    """
+
+    def __init__(self, file_path: Path, file: TextIO):
+        MarkdownScanner.check_file(file_path)
+        self.file_path = file_path
+        self.file = file
+        self.current_line_number = 0
+        self.pending: Deque[str] = deque()  # Rest of the last read
+        self.next_line = self.read_line()  # "" at the end
+
+    def read_line(self) -> str:
+        if not self.pending:
+            self.pending.extend(self.file.readline().splitlines(True))
+        return self.pending.popleft() if self.pending else ""
+
+    def __next__(self) -> str:
+        if not self.next_line:
+            raise StopIteration
+        line = self.next_line
+        self.next_line = self.read_line()
+        self.current_line_number += 1
+        check.current_line = line
+        check.current_line_number = self.current_line_number
+        return line
+
+    def __bool__(self) -> bool:
+        return bool(self.next_line)
+
+    def current_line(self) -> str | None:
+        return self.next_line or None
+
+
+@dataclass(slots=True)
 class Markdown(metaclass=CallTracker):
     """
     Contains a section of normal markdown text
@@ -102,7 +177,7 @@ class Markdown(metaclass=CallTracker):
         return Markdown("".join(text_lines))
 
 
-@dataclass
+@dataclass(slots=True)
 class SourceCode(metaclass=CallTracker):
     """
     Contains a single source-code listing:
@@ -119,18 +194,19 @@ class SourceCode(metaclass=CallTracker):
     original_code_block: str
     language_name: str = ""
     source_file_name: str = ""
-    code: str = ""
     ignore: bool = False
 
     def __post_init__(self) -> None:
-        lines = self.original_code_block.splitlines(True)
-        tagline = lines[0].strip()
-        filename_line = lines[1].strip() if len(lines) > 1 else ""
+        block = self.original_code_block
+        first_end = line_end(block, 0)
+        tagline = block[:first_end].strip()
+        filename_line = block[first_end : line_end(block, first_end)]
+        filename_line = filename_line.strip()
 
         self.ignore = tagline.endswith("!")
         tagline = tagline.rstrip("!")
-        self.language_name = tagline[3:].strip()
-        self.code = "".join(lines[1:-1])
+        # Shared by every listing in the language:
+        self.language_name = sys.intern(tagline[3:].strip())
 
         check.is_true(
             bool(self.language_name),
@@ -180,22 +256,33 @@ class SourceCode(metaclass=CallTracker):
 
     @staticmethod
     def from_source_file(
-        source_file: Path,
+        source_file: Path, text: str | None = None
     ) -> "SourceCode":
-        check.is_true(
-            source_file.exists() and source_file.is_file(),
-            f"{source_file} does not exist",
-        )
+        "text: the contents of source_file, if it was already read"
+        if text is None:
+            check.is_true(
+                source_file.exists() and source_file.is_file(),
+                f"{source_file} does not exist",
+            )
+            text = source_file.read_text(encoding="utf-8")
         check.is_true(
             source_file.suffix in LANGUAGES,
             f"{source_file} must be a source code file",
         )
         return SourceCode(
             f"```{LANGUAGES[source_file.suffix].language}\n"
-            + source_file.read_text(encoding="utf-8")
+            + text
             + "```"
         )
 
+    @property
+    def code(self) -> str:
+        "Everything between the first and last lines"
+        block = self.original_code_block
+        first_end = line_end(block, 0)
+        last_start = max(first_end, last_line_start(block))
+        return block[first_end:last_start]
+
     def __eq__(self, other):
         # Check if 'other' is of the same type
         if isinstance(other, SourceCode):
@@ -222,7 +309,7 @@ class SourceCode(metaclass=CallTracker):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Comment(metaclass=CallTracker):
     """
     Our special Markdown comments that use the following format:
@@ -237,10 +324,15 @@ class Comment(metaclass=CallTracker):
     *exactly* `%%`
     """
 
-    comment: List[str]
+    text: str
+
+    @property
+    def comment(self) -> List[str]:
+        "The lines of the comment, including the %% lines"
+        return self.text.splitlines(True)
 
     def __repr__(self) -> str:
-        return "".join(self.comment)
+        return self.text
 
     def __rich_console__(
         self, console: Console, options: ConsoleOptions
@@ -272,11 +364,21 @@ class Comment(metaclass=CallTracker):
                 bool(scanner.current_line()),
                 "Unclosed markdown comment",
             )
-        batch = "".join(comment)
-        if "url:" in batch or "path:" in batch:
-            return CodePath(Comment(comment))
+        return Comment.create(comment)
 
-        return Comment(comment)
+    @staticmethod
+    def create(comment: List[str]) -> Union["Comment", "CodePath"]:
+        "A CodePath if the comment contains 'url:' or 'path:'"
+        # Lines are joined as they were split, but lines given with
+        # no line ending at all still end up on lines of their own:
+        text = "".join(
+            line if line.splitlines() != [line] else line + "\n"
+            for line in comment[:-1]
+        ) + "".join(comment[-1:])
+        if "url:" in text or "path:" in text:
+            return CodePath(Comment(text))
+
+        return Comment(text)
 
 
 def remove_subpath(full_path: str, rest_of_path: str) -> str:
@@ -290,7 +392,7 @@ def remove_subpath(full_path: str, rest_of_path: str) -> str:
         check.error(str(e))
 
 
-@dataclass
+@dataclass(slots=True)
 class CodePath(metaclass=CallTracker):
     """
     A special comment containing a path to a directory of code files.
@@ -332,16 +434,28 @@ class CodePath(metaclass=CallTracker):
         )
 
         start_path = Path(self.path)  # type: ignore
+        # Create exact path by combining the two:
+        full_path = start_path / source_code.source_file_name
+        index = CodePath.language_index(source_code)
+        if index and index.contains(full_path):
+            return full_path
+        # Not under the language's start_search, or spelled differently:
         check.is_true(
             start_path.exists(),
             f"Starting path {start_path.as_posix()} does not exist",
         )
-        # Create exact path by combining the two:
-        full_path = start_path / source_code.source_file_name
         if full_path.exists():
             return full_path
         return None
 
+    @staticmethod
+    def language_index(source_code: SourceCode) -> SourceIndex | None:
+        "Index of the start_search directory for the listing's language"
+        start = LANGUAGES[source_code.language_name].start_search
+        if not start or not Path(start).is_dir():
+            return None
+        return source_index(Path(start))
+
     @staticmethod
     def new_based_on(source_code: SourceCode) -> "CodePath":
         """
@@ -361,22 +475,21 @@ class CodePath(metaclass=CallTracker):
         check.is_true(
             start.exists(), f"Doesn't exist: {start.as_posix()}"
         )
-        try:
-            full_path = (
-                next(  # First one; exception if none are found
-                    start.rglob(source_code.source_file_name)
-                )
-            )
-            code_path: str = remove_suffix(
-                full_path.as_posix(), source_code.source_file_name
-            )
-            return CodePath(
-                Comment(
-                    ["%%\n", f"path: {code_path}\n", "%%\n"],
-                )
+        name = source_code.source_file_name
+        matches = source_index(start).find(name)
+        check.is_true(
+            bool(matches), f"{name} not found under {start.as_posix()}"
+        )
+        if len(matches) > 1:
+            console.print(
+                f"[orange1]Ambiguous: {name} found {len(matches)} times, "
+                "using the first:[/orange1]\n"
+                + "\n".join(f"  {path.as_posix()}" for path in matches)
             )
-        except Exception as e:
-            check.error(str(e))
+        code_path: str = remove_suffix(matches[0].as_posix(), name)
+        return CodePath(
+            Comment(f"%%\npath: {code_path}\n%%\n")
+        )
 
     def __repr__(self) -> str:
         return repr(self.comment)
@@ -388,7 +501,7 @@ class CodePath(metaclass=CallTracker):
         def parts():
             yield Text(f"path: [{self.path}]\nurl: [{self.url}]")
             yield Panel(
-                "".join(self.comment.comment).strip(),
+                self.comment.text.strip(),
                 title="Source",
                 border_style="cyan2",
                 title_align="left",
@@ -405,12 +518,51 @@ class CodePath(metaclass=CallTracker):
 MarkdownPart: TypeAlias = Markdown | SourceCode | CodePath | Comment
 
 
+def line_numbers(
+    parts: Iterable[MarkdownPart],
+) -> Iterator[Tuple[int, MarkdownPart]]:
+    "(number of its first line, part) for each part"
+    line = 1
+    for part in parts:
+        yield line, part
+        line += line_breaks(repr(part))
+
+
+def display_file_name(file_path: Path) -> None:
+    console.print(
+        Panel(
+            Text(
+                file_path.name,
+                style="green3",
+            ),
+            title="[cyan2]File",
+            title_align="left",
+            border_style="yellow",
+            box=box.DOUBLE,
+        )
+    )
+
+
+class Edit(NamedTuple):
+    "Put `part` before `at`, or in place of `at` if `replace`"
+    at: MarkdownPart
+    part: MarkdownPart
+    replace: bool
+
+
 @dataclass
 class MarkdownFile(metaclass=CallTracker):
     file_path: Path
     scanner: MarkdownScanner
     contents: List[MarkdownPart]
     name_already_displayed: bool = False
+    # id(part) -> position in contents, rebuilt when it's out of date:
+    _positions: Dict[int, int] | None = field(
+        default=None, repr=False
+    )
+    # Added by plan_insert() and plan_replace(), made and cleared by
+    # commit_edits():
+    edits: List[Edit] = field(default_factory=list, repr=False)
 
     def __init__(self, file_path: Path):
         check.is_true(
@@ -420,8 +572,54 @@ class MarkdownFile(metaclass=CallTracker):
             file_path.is_file(), f"{file_path} is not a file"
         )
         self.file_path = file_path
+        self.edits = []
         self.scanner = MarkdownScanner(self.file_path)
-        self.contents = list(MarkdownFile.parse(self.scanner))
+        text = self.scanner.original_markdown
+        contents = parse_cache.load(self.file_path, text)
+        if contents is None:
+            contents = list(MarkdownFile.tokenize(text))
+            parse_cache.save(self.file_path, text, contents)
+        self.contents = contents
+
+    @staticmethod
+    def tokenize(text: str) -> Iterator[MarkdownPart]:
+        """
+        Produces the same parts as parse(), using the single-pass
+        tokenizer instead of stepping through a MarkdownScanner.
+        """
+        line_number, previous_start = 1, 0
+        for kind, start, end in tokenize(text):
+            line_number += line_breaks(text[previous_start:start])
+            previous_start = start
+            check.current_line_number = line_number
+            check.current_line = text[start : line_end(text, start)]
+            match kind:
+                case Kind.CODE:
+                    yield SourceCode(text[start:end])
+                case Kind.COMMENT:
+                    yield Comment.create(
+                        text[start:end].splitlines(True)
+                    )
+                case Kind.MARKDOWN:
+                    yield Markdown(text[start:end])
+
+    @staticmethod
+    def iter_parts(file_path: Path) -> Iterator[MarkdownPart]:
+        """
+        The parts of file_path, read and parsed as they're needed, for
+        a single pass that doesn't keep the whole file in memory.
+        Unless file_path is unchanged since it was cached, the parts
+        come from parse() and aren't added to the parse cache.
+        """
+        MarkdownScanner.check_file(file_path)
+        contents = parse_cache.load_unchanged(file_path)
+        if contents is not None:
+            yield from contents
+            return
+        with file_path.open(encoding="utf-8") as file:
+            yield from MarkdownFile.parse(
+                StreamingScanner(file_path, file)
+            )
 
     @staticmethod
     def parse(
@@ -440,28 +638,97 @@ class MarkdownFile(metaclass=CallTracker):
         if self.name_already_displayed:
             return
         self.name_already_displayed = True
-        console.print(
-            Panel(
-                Text(
-                    self.file_path.name,
-                    style="green3",
-                ),
-                title="[cyan2]File",
-                title_align="left",
-                border_style="yellow",
-                box=box.DOUBLE,
-            )
-        )
+        display_file_name(self.file_path)
 
     def write_new_file(self, file_path: Path) -> None:
-        file_path.write_text(
-            "".join([repr(section) for section in self.contents]),
-            encoding="utf-8",
-        )
+        "Each part is written as it's produced, not joined first"
+        with file_path.open("w", encoding="utf-8") as file:
+            for section in self.contents:
+                file.write(repr(section))
+
+    def first_difference(self) -> int | None:
+        """
+        Number of the first line where the parts differ from the text
+        that was parsed, or None if they reproduce it exactly
+        """
+        original = self.scanner.original_markdown
+        offset, line = 0, 1
+        for section in self.contents:
+            text = repr(section)
+            if not original.startswith(text, offset):
+                same = os.path.commonprefix(
+                    [text, original[offset : offset + len(text)]]
+                )
+                # A "\r" before the difference may end in "\r\n":
+                return line + line_breaks(same.removesuffix("\r"))
+            offset += len(text)
+            line += line_breaks(text)
+        return None if offset == len(original) else line
 
     def update(self) -> None:
-        "Write out changes into the original file"
-        self.write_new_file(self.file_path)
+        """
+        Write out changes into the original file. The new file is
+        renamed over the original, so it's never left half-written.
+        """
+        tmp_file = self.file_path.with_suffix(".update.tmp")
+        self.write_new_file(tmp_file)
+        os.replace(tmp_file, self.file_path)
+
+    def plan_insert(
+        self, at: MarkdownPart, part: MarkdownPart
+    ) -> None:
+        "Insert part before at when the edits are committed"
+        self.edits.append(Edit(at, part, replace=False))
+
+    def plan_replace(
+        self, at: MarkdownPart, part: MarkdownPart
+    ) -> None:
+        """
+        Replace at with part when the edits are committed. A part
+        can only be replaced once.
+        """
+        self.edits.append(Edit(at, part, replace=True))
+
+    def show_edits(self) -> None:
+        "Display the planned edits, with the line number of each"
+        lines = {id(part): line for line, part in line_numbers(self)}
+        for edit in self.edits:
+            action = "Replace" if edit.replace else "Insert before"
+            console.print(
+                f"{self.file_path.name} line {lines[id(edit.at)]}:"
+                + f" {action} {repr(edit.at).splitlines()[0]}"
+            )
+            console.print(repr(edit.part), end="", markup=False)
+
+    def commit_edits(self) -> None:
+        """
+        Make the planned edits in one pass over the contents, then
+        write the file once with update()
+        """
+        if not self.edits:
+            return
+        inserts: Dict[int, List[MarkdownPart]] = {}
+        replacements: Dict[int, MarkdownPart] = {}
+        for edit in self.edits:
+            check.is_true(
+                self.index_of(edit.at) >= 0,
+                f"Edit of a part that isn't in {self.file_path}",
+            )
+            if edit.replace:
+                check.is_true(
+                    id(edit.at) not in replacements,
+                    f"Part replaced twice in {self.file_path}",
+                )
+                replacements[id(edit.at)] = edit.part
+            else:
+                inserts.setdefault(id(edit.at), []).append(edit.part)
+        contents: List[MarkdownPart] = []
+        for part in self.contents:
+            contents.extend(inserts.get(id(part), []))
+            contents.append(replacements.get(id(part), part))
+        self.contents = contents
+        self.edits = []
+        self.update()
 
     def contains(self, item: type) -> bool:
         return any(isinstance(part, item) for part in self.contents)
@@ -475,15 +742,36 @@ class MarkdownFile(metaclass=CallTracker):
 
     def __setitem__(self, index, value: MarkdownPart):
         self.contents[index] = value
+        if self._positions is not None and isinstance(index, int):
+            self._positions[id(value)] = index % len(self.contents)
 
     def __len__(self):
         return len(self.contents)
 
-    def index_of(self, item):
-        try:
-            return self.contents.index(item)
-        except ValueError:
-            return -1
+    def index_of(self, item) -> int:
+        """
+        Position of item itself, not of a part equal to it (such as an
+        identical listing), or -1 if it isn't in this file
+        """
+
+        def recorded() -> int | None:
+            position = (self._positions or {}).get(id(item))
+            if (
+                position is not None
+                and position < len(self.contents)
+                and self.contents[position] is item
+            ):
+                return position
+            return None
+
+        position = recorded()
+        if position is None:  # Out of date, or item isn't here
+            self._positions = {
+                id(part): index
+                for index, part in enumerate(self.contents)
+            }
+            position = recorded()
+        return -1 if position is None else position
 
     def insert(self, index, item):
         self.contents.insert(index, item)
@@ -0,0 +1,64 @@
+# parallel.py
+"""
+Runs a file processor over many Markdown files in a process pool.
+Each worker captures its console output and records; the parent prints
+them in file order, so a parallel run reads the same as a serial one.
+"""
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Tuple
+from rich.text import Text
+from . import records
+from .console import console
+from .error_reporter import collect
+
+
+def run_captured(
+    processor: Callable[..., Any], md: Path, *args
+) -> Tuple[str, Any, int | None]:
+    """
+    Run processor, returning (console output, result, exit code).
+    In the jsonl format the output is the records instead. With
+    --keep-going, the result of a failed file is its CheckFailure.
+    """
+    result: Any = None
+    exit_code: int | None = None
+    with console.capture() as capture, records.capture() as lines:
+        try:
+            result = collect(processor, md, *args)
+        except SystemExit as e:  # check.error() calls sys.exit()
+            exit_code = e.code if isinstance(e.code, int) else 1
+    return capture.get() + "".join(lines), result, exit_code
+
+
+def map_files(
+    processor: Callable[..., Any],
+    files: List[Path],
+    *args,
+    jobs: int,
+) -> Iterator[Any]:
+    """
+    Yield processor(md, *args) for each file, in file order.
+    `jobs` is the number of worker processes (0: one per CPU).
+    As in a serial run, the first file that fails stops the run,
+    unless --keep-going makes failures results.
+    Processors must be module-level functions so they can be pickled.
+    """
+    pool = ProcessPoolExecutor(max_workers=jobs or None)
+    try:
+        futures = [
+            pool.submit(run_captured, processor, md, *args)
+            for md in files
+        ]
+        for future in futures:
+            output, result, exit_code = future.result()
+            if records.json_lines():
+                sys.stdout.write(output)
+            else:
+                console.print(Text.from_ansi(output), end="")
+            if exit_code is not None:
+                sys.exit(exit_code)
+            yield result
+    finally:
+        pool.shutdown(cancel_futures=True)
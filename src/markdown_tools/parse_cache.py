@@ -0,0 +1,126 @@
+# parse_cache.py
+"""
+Keeps the parsed contents of each Markdown file in the cache directory,
+so unchanged chapters are not parsed again. An entry is used if the
+hash of the file's text is unchanged. When the text hasn't been read,
+load_unchanged() uses the entry if the file's size and modification
+time are unchanged. Entries made with a different languages config
+(see languages.py) are not used. Set MT_NO_CACHE to parse every time.
+Long-running processes can also keep the entries in memory.
+"""
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+from . import cache
+from .languages import LANGUAGES
+
+CACHE_VERSION = 3  # Increase when the MarkdownPart classes change
+
+
+@dataclass
+class CacheEntry:
+    size: int
+    mtime_ns: int
+    digest: bytes
+    languages: bytes  # languages_digest() when it was parsed
+    contents: List[Any]  # List[MarkdownPart]
+
+
+_memory: Dict[str, CacheEntry] | None = None  # By absolute path
+
+
+def keep_in_memory(keep: bool = True) -> None:
+    "Also keep entries in this process, to skip reading cache files"
+    global _memory
+    _memory = {} if keep else None
+
+
+def enabled() -> bool:
+    return not os.environ.get("MT_NO_CACHE")
+
+
+def set_enabled(enable: bool) -> None:
+    "Stored in the environment so worker processes inherit it"
+    if enable:
+        os.environ.pop("MT_NO_CACHE", None)
+    else:
+        os.environ["MT_NO_CACHE"] = "1"
+
+
+def digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def languages_digest() -> bytes:
+    "The parts depend on the languages, which are configurable"
+    return digest(repr(LANGUAGES.languages))
+
+
+def _cache_file(file_path: Path) -> Path:
+    return cache.cache_file("parse", file_path.absolute().as_posix())
+
+
+def _entry(file_path: Path) -> CacheEntry | None:
+    if not enabled():
+        return None
+    key = file_path.absolute().as_posix()
+    entry = _memory.get(key) if _memory is not None else None
+    if entry is None:
+        entry = cache.load(_cache_file(file_path), CACHE_VERSION)
+    if (
+        not isinstance(entry, CacheEntry)
+        or entry.languages != languages_digest()
+    ):
+        return None
+    if _memory is not None:
+        _memory[key] = entry
+    return entry
+
+
+def _unchanged(file_path: Path, entry: CacheEntry) -> bool:
+    stat = file_path.stat()
+    return (stat.st_size, stat.st_mtime_ns) == (
+        entry.size,
+        entry.mtime_ns,
+    )
+
+
+def load(file_path: Path, text: str) -> List[Any] | None:
+    """
+    Cached contents of file_path (whose text is `text`), or None.
+    The text has been read, so its digest is always checked: a stat
+    can miss an edit that keeps the size within the mtime resolution.
+    """
+    entry = _entry(file_path)
+    if entry is None or digest(text) != entry.digest:
+        return None
+    return list(entry.contents)
+
+
+def load_unchanged(file_path: Path) -> List[Any] | None:
+    """
+    Cached contents of file_path if its size and modification time
+    are unchanged, so its text needn't be read to check the digest.
+    """
+    entry = _entry(file_path)
+    if entry is None or not _unchanged(file_path, entry):
+        return None
+    return list(entry.contents)
+
+
+def save(file_path: Path, text: str, contents: List[Any]) -> None:
+    if not enabled():
+        return
+    stat = file_path.stat()
+    entry = CacheEntry(
+        stat.st_size,
+        stat.st_mtime_ns,
+        digest(text),
+        languages_digest(),
+        contents,
+    )
+    if _memory is not None:
+        _memory[file_path.absolute().as_posix()] = entry
+    cache.save(_cache_file(file_path), CACHE_VERSION, entry)
@@ -0,0 +1,69 @@
+# records.py
+"""
+With `mt --format jsonl`, commands write one JSON object per line to
+stdout instead of displaying rich panels. Each record has a "kind":
+
+check     file, status ("ok" or "different"), line, seconds
+comment   file, line, path, url
+codepath  file, line, listing, path, status ("valid", "invalid" or
+          "missing")
+diff      file, line, source, status (a DiffResult name), added,
+          removed
+insert    file, line, listing, path, inserted (false in a dry run)
+use       source, chapter, listing (its number in the chapter)
+rename    original, new, renamed
+error     file, line, message
+
+The console is quiet in this format, so nothing else is written.
+"""
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, List
+from .console import console
+
+FORMATS = ("rich", "jsonl")
+
+_captured: List[str] | None = None  # Set by capture()
+
+
+def set_format(name: str) -> None:
+    "Stored in the environment so worker processes inherit it"
+    if name not in FORMATS:
+        raise ValueError(f"Unknown format: {name}")
+    os.environ["MT_FORMAT"] = name
+    console.quiet = name == "jsonl"
+
+
+def json_lines() -> bool:
+    return os.environ.get("MT_FORMAT") == "jsonl"
+
+
+def emit(kind: str, **fields: Any) -> None:
+    "Write one record; Paths are written in POSIX form"
+    record = {"kind": kind}
+    for name, value in fields.items():
+        record[name] = (
+            value.as_posix() if isinstance(value, Path) else value
+        )
+    line = json.dumps(record) + "\n"
+    if _captured is not None:
+        _captured.append(line)
+    else:
+        sys.stdout.write(line)
+
+
+@contextmanager
+def capture() -> Iterator[List[str]]:
+    "Collect the records emitted within the block, instead of writing"
+    global _captured
+    previous, _captured = _captured, []
+    try:
+        yield _captured
+    finally:
+        _captured = previous
+
+
+set_format(os.environ.get("MT_FORMAT", "rich"))
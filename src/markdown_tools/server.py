@@ -0,0 +1,137 @@
+# server.py
+"""
+`mt serve` keeps the Markdown files in the current directory parsed in
+memory, along with the source file index, and answers `mtc` requests
+(see client.py) on a localhost socket. Each request compares file
+sizes and modification times with the parsed versions, so edits are
+picked up without a restart. Requests are one line of JSON, and are
+answered one at a time with one line of JSON.
+"""
+import json
+import secrets
+import socketserver
+from pathlib import Path
+from typing import Any, Callable, Dict
+from rich.text import Text
+from . import cache, parse_cache, source_index
+from .check_markdown import display_check_markdown
+from .client import SERVER_VERSION, address_file, settings
+from .console import console
+from .display_comments import display_markdown_comments
+from .edit_changed_examples import edit_example_changes
+from .error_reporter import CheckFailure
+from .insert_codepath_tags import validate_codepath_tags
+from .markdown_file import MarkdownFile
+from .parallel import run_captured
+
+# The `mt` commands that only read files. "4" displays the differences
+# without opening VSCode:
+COMMANDS: Dict[str, Callable[[Path], Any]] = {
+    "1": display_check_markdown,
+    "2": display_markdown_comments,
+    "3": validate_codepath_tags,
+    "4": edit_example_changes,
+}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "Server"
+
+    def handle(self) -> None:
+        try:
+            message = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        if not secrets.compare_digest(
+            str(message.get("token")), self.server.token
+        ):
+            return
+        reply = self.server.run(message)
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+class Server(socketserver.TCPServer):
+    def __init__(self, root: Path) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.root = root
+        self.token = secrets.token_hex(16)
+        parse_cache.keep_in_memory()
+
+    def warm(self) -> int:
+        "Parse every Markdown file; returns the number of files"
+        files = sorted(self.root.glob("*.md"))
+        for md in files:  # Requests report any errors
+            run_captured(MarkdownFile, md)
+        return len(files)
+
+    def publish(self) -> Path:
+        "Record the address where clients in root can find it"
+        host, port = self.server_address[:2]
+        address = address_file(self.root)
+        # The token is only for this user, from when it is written:
+        cache.save(
+            address, SERVER_VERSION, (host, port, self.token), 0o600
+        )
+        return address
+
+    def run(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        "Run `mt <command> [filename]` the way process_files() would"
+        args = message["args"]
+        if (
+            message.get("settings") != settings()
+            or not 1 <= len(args) <= 2
+            or args[0] not in COMMANDS
+            or any(arg.startswith("-") for arg in args)
+        ):
+            return {"served": False}
+        if len(args) == 2:
+            md = self.root / args[1]
+            if not (
+                md.is_relative_to(self.root)
+                and md.resolve().is_relative_to(self.root.resolve())
+            ):  # Outside root: the client runs the command itself
+                return {"served": False}
+            files = [md]
+        else:
+            files = sorted(self.root.glob("*.md"))
+        console.width = message["width"]
+        source_index.forget()  # Sources may have changed since
+        output, exit_code = "", 0
+        for md in files:
+            md_output, result, md_exit_code = run_captured(
+                COMMANDS[args[0]], md.relative_to(self.root)
+            )
+            output += md_output
+            if isinstance(result, CheckFailure):  # --keep-going
+                with console.capture() as capture:
+                    result.display()
+                output += capture.get()
+                exit_code = 1
+            if md_exit_code is not None:
+                exit_code = md_exit_code
+                break
+        if not message["color"]:
+            output = Text.from_ansi(output).plain
+        return {
+            "served": True,
+            "output": output,
+            "exit_code": exit_code,
+        }
+
+
+def serve() -> None:
+    "Answer requests for the current directory until interrupted"
+    root = Path.cwd()
+    with Server(root) as server:
+        count = server.warm()
+        address = server.publish()
+        console.print(
+            f"Serving {count} Markdown files in {root}"
+            + " (Ctrl-C to stop)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            address.unlink(missing_ok=True)
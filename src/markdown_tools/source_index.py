@@ -0,0 +1,86 @@
+# source_index.py
+"""
+Maps file names to their paths under a language's `start_search`
+directory, so source files are found without walking the tree for
+every listing. Each index is built once and saved in the cache; it is
+rebuilt when the modification time of any directory in the tree
+changes, which happens whenever a file is added, removed or renamed.
+"""
+import os
+from pathlib import Path
+from typing import Dict, List
+from . import cache
+
+INDEX_VERSION = 1
+
+
+class SourceIndex:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.files: Dict[str, List[str]] = {}  # Name -> posix paths
+        self.directories: Dict[str, int] = {}  # Path -> st_mtime_ns
+        for directory, _, file_names in os.walk(root):
+            self.directories[Path(directory).as_posix()] = os.stat(
+                directory
+            ).st_mtime_ns
+            for name in file_names:
+                self.files.setdefault(name, []).append(
+                    Path(directory, name).as_posix()
+                )
+        for paths in self.files.values():
+            paths.sort()
+
+    def is_current(self) -> bool:
+        "True if no directory in the tree has changed"
+        try:
+            return all(
+                os.stat(directory).st_mtime_ns == mtime
+                for directory, mtime in self.directories.items()
+            )
+        except OSError:  # A directory was removed
+            return False
+
+    def find(self, source_file_name: str) -> List[Path]:
+        """
+        All paths ending with source_file_name, which may include
+        leading directories, as in `rglob(source_file_name)`.
+        """
+        name = Path(source_file_name)
+        suffix = "/" + name.as_posix()
+        return [
+            Path(path)
+            for path in self.files.get(name.name, [])
+            if path.endswith(suffix)
+        ]
+
+    def contains(self, path: Path) -> bool:
+        return path.as_posix() in self.files.get(path.name, [])
+
+    def contains_directory(self, path: Path) -> bool:
+        return path.as_posix() in self.directories
+
+
+_indexes: Dict[Path, SourceIndex] = {}  # Built or loaded this run
+
+
+def forget() -> None:
+    """
+    Long-running processes call this before each request, so the next
+    source_index() checks again that its index is current.
+    """
+    _indexes.clear()
+
+
+def source_index(root: Path) -> SourceIndex:
+    "The SourceIndex for root, from memory, the cache, or a new walk"
+    if root in _indexes:
+        return _indexes[root]
+    cache_file = cache.cache_file(
+        "source_index", root.absolute().as_posix()
+    )
+    index = cache.load(cache_file, INDEX_VERSION)
+    if not (isinstance(index, SourceIndex) and index.is_current()):
+        index = SourceIndex(root)
+        cache.save(cache_file, INDEX_VERSION, index)
+    _indexes[root] = index
+    return index
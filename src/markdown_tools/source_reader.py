@@ -0,0 +1,131 @@
+# source_reader.py
+"""
+Reads the source files for a chapter's listings together, in a
+bounded pool of threads, so the waits for a slow (such as network)
+drive overlap instead of adding up. Each file is read once, however
+many listings use it.
+
+The digest of each source file's text is kept in the cache for each
+chapter, with the file's size and modification time. A listing whose
+source file is unchanged, and whose digest matches, is known to match
+its source file without reading it.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Tuple, TypeVar
+from . import cache, parse_cache
+from .markdown_file import MarkdownFile, SourceCode
+from .usage_index import path_key
+
+MAX_THREADS = 8
+DIGESTS_VERSION = 1
+
+# Source file key -> (size, mtime_ns, digest of its text)
+Digests = Dict[str, Tuple[int, int, bytes]]
+
+
+def _read(path: Path) -> str | None:
+    "None if path can't be read; the caller reports why"
+    try:
+        return path.read_text(encoding="utf-8")
+    except (OSError, ValueError):
+        return None
+
+
+def _stamp(path: Path) -> Tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+T = TypeVar("T")
+
+
+def _map(
+    function: Callable[[Path], T], paths: Iterable[Path]
+) -> Dict[Path, T]:
+    "function(path) for each distinct path, called in threads"
+    distinct = list(dict.fromkeys(paths))
+    if len(distinct) < 2:
+        return {path: function(path) for path in distinct}
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_THREADS, len(distinct))
+    ) as pool:
+        return dict(zip(distinct, pool.map(function, distinct)))
+
+
+def read_sources(paths: Iterable[Path]) -> Dict[Path, str | None]:
+    "The text of each distinct path, or None if it can't be read"
+    return _map(_read, paths)
+
+
+def listings_with_sources(
+    md_file: MarkdownFile, source: Path | None = None
+) -> Iterator[Tuple[SourceCode, Path, str | None]]:
+    """
+    (listing, source file, source text) for each listing in md_file
+    taken from a source file; only those from `source` if it's given.
+    The source files are all read before the first one is returned.
+    A listing that is known to match its unchanged source file is
+    returned with its own code as the source text.
+    """
+    digests_file = cache.cache_file(
+        "digests", md_file.file_path.absolute().as_posix()
+    )
+    digests: Digests = {}
+    if parse_cache.enabled():
+        digests = cache.load(digests_file, DIGESTS_VERSION) or {}
+    listings = []
+    for (
+        code_path,
+        example_code,
+    ) in md_file.code_path_and_example_code():
+        full_path = Path(code_path.path) / Path(  # type: ignore
+            example_code.source_file_name
+        )
+        if source is None or path_key(full_path) == path_key(source):
+            listings.append((example_code, full_path))
+    # Before reading, so a file changed during the read isn't recorded
+    # as unchanged:
+    stamps = {
+        full_path: _stamp(full_path) for _, full_path in listings
+    }
+    matched = [
+        _matches(digests, stamps[full_path], example_code, full_path)
+        for example_code, full_path in listings
+    ]
+    texts = read_sources(
+        full_path
+        for (_, full_path), match in zip(listings, matched)
+        if not match
+    )
+    for full_path, text in texts.items():
+        key = path_key(full_path)
+        stamp = stamps[full_path]
+        if text is None or stamp is None:
+            digests.pop(key, None)
+        else:
+            digests[key] = (*stamp, parse_cache.digest(text))
+    if texts and parse_cache.enabled():
+        cache.save(digests_file, DIGESTS_VERSION, digests)
+    for (example_code, full_path), match in zip(listings, matched):
+        if match:
+            yield example_code, full_path, example_code.code
+        else:
+            yield example_code, full_path, texts[full_path]
+
+
+def _matches(
+    digests: Digests,
+    stamp: Tuple[int, int] | None,
+    example_code: SourceCode,
+    full_path: Path,
+) -> bool:
+    "True if full_path is unchanged and its text is example_code's"
+    recorded = digests.get(path_key(full_path))
+    if recorded is None or stamp is None:
+        return False
+    return recorded == (*stamp, parse_cache.digest(example_code.code))
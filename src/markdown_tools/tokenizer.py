@@ -0,0 +1,113 @@
+#: tokenizer.py
+"""
+Finds the boundaries of Markdown text, code listings and %% comments
+in a single pass over the text of a Markdown file, without splitting
+it into lines. Produces (kind, start, end) offsets into the text.
+Lines end wherever str.splitlines() ends them, so the boundaries are
+the same as the ones found by MarkdownScanner and the parse() methods.
+"""
+import re
+from enum import Enum
+from typing import Iterator, NamedTuple
+from .error_reporter import check
+
+# The line boundaries recognized by str.splitlines():
+_SEPARATORS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+_LINE_END = re.compile(f"\r\n|[{_SEPARATORS}]")
+# Each pattern matches the separator ending the previous line, which
+# is much faster to search for than a lookbehind:
+_BREAK = re.compile(f"[{_SEPARATORS}](?:```|%%)")  # Ends Markdown text
+_FENCE = re.compile(f"[{_SEPARATORS}]```")
+_COMMENT_MARKER = re.compile(f"[{_SEPARATORS}]%%")
+
+
+class Kind(Enum):
+    MARKDOWN = "markdown"
+    CODE = "code"
+    COMMENT = "comment"
+
+
+class Token(NamedTuple):
+    kind: Kind
+    start: int
+    end: int
+
+
+def line_breaks(text: str) -> int:
+    "Number of line endings in text, so lines are numbered as here"
+    return sum(1 for _ in _LINE_END.finditer(text))
+
+
+def line_end(text: str, pos: int) -> int:
+    "Offset just past the line that starts at pos"
+    match = _LINE_END.search(text, pos)
+    return match.end() if match else len(text)
+
+
+def _line_start(pattern: re.Pattern, text: str, pos: int) -> int:
+    """
+    Offset of the first line at or after pos (pos > 0) that begins
+    with pattern, or -1 if there isn't one.
+    """
+    match = pattern.search(text, pos - 1)
+    return match.start() + 1 if match else -1
+
+
+def last_line_start(text: str) -> int:
+    "Offset of the start of the last line in text"
+    end = len(text)
+    if text.endswith("\r\n"):
+        end -= 2
+    elif text and text[-1] in _SEPARATORS:
+        end -= 1
+    start = text.rfind("\n", 0, end) + 1
+    for separator in _SEPARATORS[1:]:
+        start = max(start, text.rfind(separator, start, end) + 1)
+    return start
+
+
+def _code_end(text: str, pos: int) -> int:
+    "pos follows the opening ```; include the closing ``` line"
+    fence = _line_start(_FENCE, text, pos)
+    if fence < 0:
+        return len(text)
+    end = line_end(text, fence)
+    closing = text[fence:end]
+    check.current_line = closing
+    # Closing tag must not be followed by a language:
+    check.is_true(
+        len(closing.strip()) == len("```"), "Unclosed code block"
+    )
+    return end
+
+
+def _comment_end(text: str, pos: int) -> int:
+    "pos follows the opening %%; include the closing %% line"
+    marker = _line_start(_COMMENT_MARKER, text, pos)
+    while marker >= 0:
+        end = line_end(text, marker)
+        if text[marker:end].rstrip() == "%%":
+            return end
+        marker = _line_start(_COMMENT_MARKER, text, end)
+    check.error("Unclosed markdown comment")
+
+
+def tokenize(text: str) -> Iterator[Token]:
+    pos = 0
+    while pos < len(text):
+        end = line_end(text, pos)
+        line = text[pos:end]
+        if line.startswith("```"):
+            token = Token(Kind.CODE, pos, _code_end(text, end))
+        elif line.strip() == "%%":
+            token = Token(Kind.COMMENT, pos, _comment_end(text, end))
+        else:
+            # The first line is always Markdown text:
+            next_break = _line_start(_BREAK, text, end)
+            token = Token(
+                Kind.MARKDOWN,
+                pos,
+                len(text) if next_break < 0 else next_break,
+            )
+        yield token
+        pos = token.end
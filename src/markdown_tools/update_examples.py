@@ -4,48 +4,91 @@ from markdown_tools.markdown_file import (
     MarkdownFile,
     SourceCode,
     check,
+    line_numbers,
 )
 from markdown_tools.utils import prompt
 from markdown_tools.console import console
-from markdown_tools.compare_strings import compare_strings, DiffResult
+from markdown_tools.compare_strings import (
+    compare_strings,
+    CompareResult,
+    DiffResult,
+)
+from markdown_tools.source_reader import listings_with_sources
+from markdown_tools import records
 
 
-def update_examples_from_source_code(md: Path) -> None:
+def update_examples_from_source_code(
+    md: Path,
+    yes: bool = False,
+    only_blank_lines: bool = False,
+    dry_run: bool = False,
+    source: Path | None = None,
+) -> int:
+    """
+    Replaces examples that differ from their source files. Accepted
+    replacements are made in memory, and the file is written once at
+    the end. yes: accept without prompting. only_blank_lines: skip
+    content differences. dry_run: show the changes without making them.
+    source: only update the examples taken from this file.
+    Returns the number of examples left different from their source.
+    """
     md_file = MarkdownFile(md)
     md_file.display_name_once()
-    for (
-        code_path,
-        example_code,
-    ) in md_file.code_path_and_example_code():
-        full_path = Path(code_path.path) / Path(  # type: ignore
-            example_code.source_file_name
-        )
+    json_lines = records.json_lines()
+    lines = (  # Of each listing, for the records
+        {id(part): line for line, part in line_numbers(md_file)}
+        if json_lines
+        else {}
+    )
+
+    def show(diff: CompareResult, full_path: Path) -> None:
+        if json_lines:
+            diff.record(md, lines[id(example_code)], full_path)
+        else:
+            diff.show_result(full_path)
+
+    unchanged = 0
+    for example_code, full_path, text in listings_with_sources(
+        md_file, source
+    ):
+        if text == example_code.code:  # Matches; no need to compare
+            same = CompareResult(DiffResult.NONE, text, text)
+            show(same, full_path)
+            continue
         check.is_true(
-            full_path.exists(),
+            text is not None or full_path.exists(),
             f"{full_path.as_posix()} does not exist",
         )
-
-        source_file = SourceCode.from_source_file(full_path)
+        source_file = SourceCode.from_source_file(full_path, text)
         diff = compare_strings(example_code.code, source_file.code)
-        diff.show_result(full_path)
+        show(diff, full_path)
 
-        def prompt_and_update():
-            diff.show_diffs(md_file)
-            if prompt():
-                console.print(
-                    "Replacing markdown example with source file"
-                )
-                md_file[md_file.index_of(example_code)] = source_file
-                md_file.update()
-            else:
-                console.print(
-                    f"No changes to {example_code.source_file_name}"
-                )
+        def accept(diff: CompareResult) -> bool:
+            "Replace the example (or in a dry run, would it be)?"
+            if only_blank_lines and diff.result == DiffResult.CONTENT:
+                return False
+            if not (yes or json_lines):
+                diff.show_diffs(md_file)
+            return yes or dry_run or prompt()
 
         match diff.result:
             case DiffResult.NONE:
                 assert source_file == example_code
-            case DiffResult.BLANK_LINES:
-                prompt_and_update()
-            case DiffResult.CONTENT:
-                prompt_and_update()
+            case DiffResult.BLANK_LINES | DiffResult.CONTENT:
+                if not accept(diff):
+                    console.print(
+                        f"No changes to {example_code.source_file_name}"
+                    )
+                    unchanged += 1
+                elif dry_run:
+                    console.print(
+                        f"Would replace {example_code.source_file_name}"
+                    )
+                    unchanged += 1
+                else:
+                    console.print(
+                        "Replacing markdown example with source file"
+                    )
+                    md_file.plan_replace(example_code, source_file)
+    md_file.commit_edits()
+    return unchanged
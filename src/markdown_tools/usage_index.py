@@ -0,0 +1,117 @@
+# usage_index.py
+"""
+Maps each source file to the chapters that use it, and to the
+listings within those chapters. The index for a chapter directory is
+saved in the cache. When it is loaded, only the chapters whose size or
+modification time has changed are indexed again.
+"""
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
+from . import cache
+from .error_reporter import CheckFailure
+from .markdown_file import CodePath, MarkdownFile, SourceCode
+from .parallel import run_captured
+
+INDEX_VERSION = 1
+
+
+def path_key(path: Path | str) -> str:
+    "Compare paths reported by the OS with paths from CodePath tags"
+    return os.path.normcase(os.path.abspath(path))
+
+
+class Usage(NamedTuple):
+    chapter: Path
+    listing: int  # Listings are numbered from 1 in each chapter
+
+
+def listing_sources(
+    md: Path, md_file: MarkdownFile | None = None
+) -> Dict[str, List[int]]:
+    """
+    Source file key -> numbers of the listings in md taken from it.
+    md_file: md, if it's already parsed.
+    """
+    # An empty MarkdownFile is false, so compare with None:
+    parts = (
+        MarkdownFile.iter_parts(md) if md_file is None else md_file
+    )
+    sources: Dict[str, List[int]] = {}
+    code_path: CodePath | None = None
+    listing = 0
+    for part in parts:
+        if isinstance(part, CodePath):
+            code_path = part
+        elif isinstance(part, SourceCode):
+            listing += 1
+            if (
+                part.source_file_name
+                and code_path is not None
+                and code_path.path is not None
+            ):
+                source = path_key(
+                    Path(code_path.path) / part.source_file_name
+                )
+                sources.setdefault(source, []).append(listing)
+    return sources
+
+
+# Chapter name -> ((size, mtime_ns), listing_sources())
+Chapters = Dict[str, Tuple[Tuple[int, int], Dict[str, List[int]]]]
+
+
+class UsageIndex:
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.cache_file = cache.cache_file(
+            "usage", directory.absolute().as_posix()
+        )
+        self.chapters: Chapters = (
+            cache.load(self.cache_file, INDEX_VERSION) or {}
+        )
+        self.users: Dict[str, List[Usage]] = {}  # Source key -> uses
+        self.refresh()
+
+    def refresh(self) -> None:
+        "Index new and changed chapters, and forget removed ones"
+        current = {
+            md.name: md
+            for md in self.directory.glob("*.md")
+            if not md.name.endswith(".tmp.md")
+        }
+        for name in self.chapters.keys() - current.keys():
+            del self.chapters[name]
+        changed = False
+        for name, md in current.items():
+            stat = md.stat()
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            if name not in self.chapters or (
+                self.chapters[name][0] != stamp
+            ):
+                self.index(md, stamp)
+                changed = True
+        self.users.clear()
+        for name, (_, sources) in sorted(self.chapters.items()):
+            for source, listings in sources.items():
+                self.users.setdefault(source, []).extend(
+                    Usage(self.directory / name, listing)
+                    for listing in listings
+                )
+        if changed:
+            cache.save(self.cache_file, INDEX_VERSION, self.chapters)
+
+    def index(self, md: Path, stamp: Tuple[int, int]) -> None:
+        _, sources, exit_code = run_captured(listing_sources, md)
+        # With --keep-going, a failure is returned instead of raised:
+        if exit_code is None and not isinstance(sources, CheckFailure):
+            self.chapters[md.name] = (stamp, sources)
+        else:  # Can't be parsed; try again next time
+            self.chapters.pop(md.name, None)
+
+    def uses(self, source: Path | str) -> List[Usage]:
+        "The listings taken from source, in chapter order"
+        return self.users.get(path_key(source), [])
+
+    def chapters_using(self, source: Path | str) -> List[Path]:
+        return sorted({use.chapter for use in self.uses(source)})
@@ -0,0 +1,251 @@
+# watch.py
+"""
+`mt watch` re-checks whatever changes, as it changes. A changed
+chapter is checked and its code path tags validated; a changed source
+file is compared with only the listings that were taken from it, found
+through the UsageIndex. Uses inotify on
+Linux and polls file sizes and modification times elsewhere. A burst
+of events, such as an editor's save, is handled once.
+"""
+import ctypes
+import os
+import select
+import struct
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Tuple
+from rich.text import Text
+from . import parse_cache, source_index
+from .check_markdown import display_check_markdown
+from .compare_strings import DiffResult, compare_strings
+from .console import console
+from .error_reporter import CheckFailure
+from .insert_codepath_tags import validate_codepath_tags
+from .languages import LANGUAGES
+from .markdown_file import MarkdownFile, SourceCode
+from .parallel import run_captured
+from .usage_index import UsageIndex, path_key
+
+
+def _directories(root: Path) -> Iterator[str]:
+    "root and the directories below it, except hidden ones like .git"
+    for directory, subdirectories, _ in os.walk(root):
+        subdirectories[:] = [
+            name
+            for name in subdirectories
+            if not name.startswith(".")
+        ]
+        yield directory
+
+
+class Watcher(ABC):
+    "Reports the paths of changed files in the watched directories"
+
+    def __init__(self, roots: List[Path]) -> None:
+        self.roots = roots
+
+    @abstractmethod
+    def wait(self, timeout: float | None) -> Set[str]:
+        "Changes within timeout seconds (None: wait for a change)"
+
+    def changes(self, debounce: float = 0.2) -> Set[str]:
+        "Wait for a change, then collect more until `debounce` passes"
+        changed = self.wait(None)
+        while more := self.wait(debounce):
+            changed |= more
+        return changed
+
+    def close(self) -> None:
+        "Release anything the watcher holds open"
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exception: Any) -> None:
+        self.close()
+
+
+class PollingWatcher(Watcher):
+    def __init__(
+        self, roots: List[Path], interval: float = 0.5
+    ) -> None:
+        super().__init__(roots)
+        self.interval = interval
+        self.stamps = self.scan()
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        "Path -> (size, modification time) for every file"
+        stamps: Dict[str, Tuple[int, int]] = {}
+        for root in self.roots:
+            for directory in _directories(root):
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            stamps[entry.path] = (
+                                stat.st_size,
+                                stat.st_mtime_ns,
+                            )
+        return stamps
+
+    def wait(self, timeout: float | None) -> Set[str]:
+        while True:
+            time.sleep(self.interval if timeout is None else timeout)
+            stamps = self.scan()
+            changed = {
+                path
+                for path in stamps.keys() | self.stamps.keys()
+                if stamps.get(path) != self.stamps.get(path)
+            }
+            self.stamps = stamps
+            if changed or timeout is not None:
+                return changed
+
+
+class InotifyWatcher(Watcher):
+    "Linux only; raises OSError if inotify is unavailable"
+
+    IN_MODIFY = 0x002
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_CLOSE_WRITE = 0x008
+    IN_ISDIR = 0x40000000
+    MASK = (
+        IN_MODIFY
+        | IN_CLOSE_WRITE
+        | IN_MOVED_FROM
+        | IN_MOVED_TO
+        | IN_CREATE
+        | IN_DELETE
+    )
+    EVENT = struct.Struct("iIII")  # wd, mask, cookie, len(name)
+
+    def __init__(self, roots: List[Path]) -> None:
+        super().__init__(roots)
+        try:
+            self.libc = ctypes.CDLL(None, use_errno=True)
+            self.fd = self.libc.inotify_init()
+        except (OSError, AttributeError) as e:
+            raise OSError(f"inotify is unavailable: {e}")
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init failed")
+        self.directories: Dict[int, str] = {}  # Watch -> directory
+        for root in roots:
+            self.add_tree(root)
+
+    def add_tree(self, root: Path | str) -> None:
+        for directory in _directories(Path(root)):
+            watch = self.libc.inotify_add_watch(
+                self.fd, os.fsencode(directory), self.MASK
+            )
+            if watch < 0:  # Such as too many watches: poll instead
+                self.close()
+                raise OSError(ctypes.get_errno(), directory)
+            self.directories[watch] = directory
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def wait(self, timeout: float | None) -> Set[str]:
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed: Set[str] = set()
+        offset = 0
+        while offset < len(data):
+            watch, mask, _, size = self.EVENT.unpack_from(
+                data, offset
+            )
+            offset += self.EVENT.size
+            name = data[offset : offset + size].rstrip(b"\0")
+            offset += size
+            if watch not in self.directories or not name:
+                continue
+            path = os.path.join(
+                self.directories[watch], os.fsdecode(name)
+            )
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self.add_tree(path)
+            else:
+                changed.add(path)
+        return changed
+
+
+def create_watcher(roots: List[Path]) -> Watcher:
+    try:
+        return InotifyWatcher(roots)
+    except OSError:
+        return PollingWatcher(roots)
+
+
+def diff_listings(md: Path, source: Path) -> None:
+    "Compare the listings in md that were taken from source"
+    md_file = MarkdownFile(md)
+    for (
+        code_path,
+        example_code,
+    ) in md_file.code_path_and_example_code():
+        full_path = Path(code_path.path) / Path(  # type: ignore
+            example_code.source_file_name
+        )
+        if path_key(full_path) != path_key(source):
+            continue
+        source_code = SourceCode.from_source_file(source)
+        diff = compare_strings(example_code.code, source_code.code)
+        if diff.result == DiffResult.CONTENT:
+            diff.show_diffs(md_file)
+        else:
+            console.print(
+                f"{md.name}: {example_code.source_file_name} [OK]"
+            )
+
+
+def _show(processor, md: Path, *args) -> None:
+    output, result, _ = run_captured(processor, md, *args)
+    console.print(Text.from_ansi(output), end="")
+    if isinstance(result, CheckFailure):  # --keep-going
+        result.display()
+
+
+def watch(chapters: Path) -> None:
+    "Check changes in chapters and the source roots until interrupted"
+    parse_cache.keep_in_memory()
+    roots = [chapters] + [
+        Path(language.start_search)
+        for language in LANGUAGES.languages
+        if language.start_search
+        and Path(language.start_search).is_dir()
+    ]
+    index = UsageIndex(chapters)
+    watcher = create_watcher(roots)
+    console.print(
+        f"Watching {', '.join(root.as_posix() for root in roots)}"
+        + f" ({type(watcher).__name__}, Ctrl-C to stop)"
+    )
+    try:
+        while True:
+            changes = watcher.changes()
+            source_index.forget()  # Sources may have changed since
+            for changed in sorted(changes):
+                path = Path(changed)
+                if (
+                    path_key(path.parent) == path_key(chapters)
+                    and path.suffix == ".md"
+                    and not path.name.endswith(".tmp.md")
+                ):
+                    index.refresh()
+                    if path.exists():
+                        _show(display_check_markdown, path)
+                        _show(validate_codepath_tags, path)
+                for md in index.chapters_using(changed):
+                    _show(diff_listings, md, path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
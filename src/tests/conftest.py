@@ -0,0 +1,48 @@
+# conftest.py
+from pathlib import Path
+from typing import Callable, Dict, List
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def cache_dir(tmp_path_factory):
+    "Keep the tests' cache files out of the user's cache directory"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv(
+            "MT_CACHE_DIR", str(tmp_path_factory.mktemp("cache"))
+        )
+        yield
+
+
+@pytest.fixture
+def make_book(tmp_path: Path) -> Callable[..., Path]:
+    """
+    make_book(chapters, sources) writes each source file into
+    tmp_path/code and each chapter into tmp_path, and returns
+    tmp_path/code. A chapter is its text, or the names of the sources
+    it has listings of, under a code path tag for tmp_path/code.
+    """
+
+    def make(
+        chapters: Dict[str, str | List[str]],
+        sources: Dict[str, str] | None = None,
+    ) -> Path:
+        if sources is None:
+            sources = {"a.py": "# a.py\nprint('a')\n"}
+        code = tmp_path / "code"
+        code.mkdir()
+        for name, text in sources.items():
+            (code / name).write_text(text, encoding="utf-8")
+        for name, chapter in chapters.items():
+            if not isinstance(chapter, str):
+                chapter = (
+                    f"%%\npath: {code.as_posix()}\n%%\n"
+                    + "".join(
+                        f"```python\n{sources[listing]}```\n"
+                        for listing in chapter
+                    )
+                )
+            (tmp_path / name).write_text(chapter, encoding="utf-8")
+        return code
+
+    return make
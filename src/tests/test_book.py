@@ -0,0 +1,67 @@
+# test_book.py
+from pathlib import Path
+from typing import Dict, List
+import pytest
+from markdown_tools import markdown_file
+from markdown_tools.book import Book, validate_book
+from markdown_tools.error_reporter import set_keep_going
+from markdown_tools.usage_index import Usage
+
+
+@pytest.fixture
+def source(make_book) -> Path:
+    "Three chapters with a listing from code/a.py, and a README"
+    chapters: Dict[str, str | List[str]] = {
+        name: ["a.py"]
+        for name in ["10. Later.md", "2. Early.md", "A1. Appendix.md"]
+    }
+    chapters["README.md"] = "# Book\n"
+    chapters["2. Early.tmp.md"] = ""
+    return make_book(chapters, {"a.py": "# a.py\n"}) / "a.py"
+
+
+def test_discover_in_book_order(tmp_path: Path, source: Path):
+    assert [md.name for md in Book.discover(tmp_path)] == [
+        "2. Early.md",
+        "10. Later.md",
+        "A1. Appendix.md",
+        "README.md",
+    ]
+
+
+def test_uses(tmp_path: Path, source: Path):
+    book = Book(tmp_path)
+    assert book.uses(source) == [
+        Usage(tmp_path / "2. Early.md", 1),
+        Usage(tmp_path / "10. Later.md", 1),
+        Usage(tmp_path / "A1. Appendix.md", 1),
+    ]
+    assert book.chapters_using(tmp_path / "b.py") == []
+
+
+def test_validate_parses_each_file_once(
+    tmp_path: Path, source: Path, monkeypatch
+):
+    (tmp_path / "3. Empty.md").write_text("", encoding="utf-8")
+    book = Book(tmp_path)
+
+    def fail(*args):
+        raise AssertionError("parsed a file again")
+
+    for method in ["__init__", "iter_parts"]:
+        monkeypatch.setattr(markdown_file.MarkdownFile, method, fail)
+    assert validate_book(book) == 0
+
+
+def test_keep_going_collects_failures(tmp_path: Path, source: Path):
+    (tmp_path / "3. Broken.md").write_text("%%\nUnclosed\n")
+    set_keep_going(True)
+    try:
+        book = Book(tmp_path)
+        assert validate_book(book) == 0
+    finally:
+        set_keep_going(False)
+    assert len(book) == 4
+    (failure,) = book.failures
+    assert failure.file == tmp_path / "3. Broken.md"
+    assert failure.message == "Unclosed markdown comment"
@@ -3,7 +3,11 @@ from pathlib import Path
 from io import StringIO
 from unittest.mock import patch
 from markdown_tools.check_markdown import check_markdown
-from markdown_tools.markdown_file import MarkdownFile
+from markdown_tools.markdown_file import (
+    Comment,
+    MarkdownFile,
+    line_numbers,
+)
 
 
 @pytest.fixture
@@ -34,6 +38,26 @@ def test_check_markdown_identical_content(create_test_file):
     assert check_markdown(md_path) == "OK"
 
 
+def test_first_difference(create_test_file):
+    def first_difference(text: str) -> int | None:
+        return MarkdownFile(create_test_file(text)).first_difference()
+
+    assert first_difference("Text\n```python\n# a.py\n```\n") is None
+    assert first_difference("Text\n\n``` text\noutput\n```\n") == 3
+    assert first_difference("Text\n```text\noutput\n```") == 4
+
+
+def test_check_markdown_reports_line(create_test_file, capsys):
+    md_path = create_test_file("Text\n\n``` text\noutput\n```\n")
+    with pytest.raises(SystemExit):
+        check_markdown(md_path)
+    assert "from line 3" in capsys.readouterr().out
+    assert (
+        md_path.with_suffix(".tmp.md").read_text(encoding="utf-8")
+        == "Text\n\n```text\noutput\n```\n"
+    )
+
+
 # def test_check_markdown_different_content(create_test_file):
 #     md_content = "# Sample Markdown\n\nThis is a test."
 #     md_modified_content = (
@@ -49,3 +73,16 @@ def test_check_markdown_identical_content(create_test_file):
 
 
 # Additional tests can be written to cover more scenarios and edge cases.
+
+
+# Files are read with universal newlines, so "\r" is read as "\n":
+@pytest.mark.parametrize("ending", ["\n", "\x0c", "\x85", "\u2028"])
+def test_line_numbers_follow_splitlines(tmp_path: Path, ending):
+    md = tmp_path / "chapter.md"
+    lines = ["Intro", "%%", "Note", "%%", "```text", "out", "```\n"]
+    md.write_text(ending.join(lines), encoding="utf-8")
+    markdown = MarkdownFile(md)
+    assert [line for line, _ in line_numbers(markdown)] == [1, 2, 5]
+    note = ending.join(["%%", "NOTE", "%%", ""])
+    markdown.contents[1] = Comment(note)
+    assert markdown.first_difference() == 3
@@ -0,0 +1,74 @@
+# test_compare_strings.py
+import os
+from random import Random
+import pytest
+from markdown_tools.compare_strings import (
+    compare_strings,
+    DiffResult,
+    DIFF_ENGINES,
+    myers_diff,
+    patience_diff,
+    set_diff_engine,
+)
+
+
+def test_match_creates_no_diffs():
+    result = compare_strings("a\nb\n", "a\nb\n")
+    assert result.result == DiffResult.NONE
+    assert "diffs" not in vars(result)  # Not created yet
+
+
+def test_blank_lines_only():
+    result = compare_strings("a\nb\n", "a\n\nb\n")
+    assert result.result == DiffResult.BLANK_LINES
+
+
+def test_content_difference_diffs():
+    result = compare_strings("a\nb\n", "a\nc\n")
+    assert result.result == DiffResult.CONTENT
+    assert [line.split()[-1] for line in result.diffs] == [
+        "a",
+        "b[/dark_red]",
+        "c[/dark_magenta]",
+    ]
+
+
+def apply(diff: list[str]) -> tuple[list[str], list[str]]:
+    "Rebuild both inputs from a Differ-format diff"
+    a = [line[2:] for line in diff if line[:2] in ("  ", "- ")]
+    b = [line[2:] for line in diff if line[:2] in ("  ", "+ ")]
+    return a, b
+
+
+@pytest.mark.parametrize("engine", ["myers", "patience"])
+def test_engines_reproduce_inputs(engine: str):
+    diff_engine = DIFF_ENGINES[engine]
+    random = Random(42)
+    for _ in range(200):
+        a = [random.choice("abc{}") for _ in range(random.randrange(12))]
+        b = [random.choice("abc{}") for _ in range(random.randrange(12))]
+        assert apply(list(diff_engine(a, b))) == (a, b)
+
+
+def test_myers_is_minimal():
+    a, b = list("abcabba"), list("cbabac")
+    changes = [
+        line for line in myers_diff(a, b) if not line.startswith("  ")
+    ]
+    assert len(changes) == 5
+
+
+def test_patience_anchors_on_unique_lines():
+    a = ["def f():", "}", "def g():", "}"]
+    b = ["def g():", "}", "def f():", "}"]
+    assert "  def g():" in list(patience_diff(a, b))
+
+
+def test_diff_engine_setting(monkeypatch):
+    monkeypatch.setenv("MT_DIFF_ENGINE", "difflib")
+    expected = compare_strings("a\nb\n", "a\nc\n").diffs
+    set_diff_engine("patience")
+    assert os.environ["MT_DIFF_ENGINE"] == "patience"
+    assert compare_strings("a\nb\n", "a\nc\n").diffs == expected
+    with pytest.raises(ValueError):
+        set_diff_engine("fastest")
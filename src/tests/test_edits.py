@@ -0,0 +1,70 @@
+# test_edits.py
+from pathlib import Path
+import pytest
+from markdown_tools.console import console
+from markdown_tools.insert_codepath_tags import insert_codepath_tags
+from markdown_tools.markdown_file import (
+    Comment,
+    MarkdownFile,
+    SourceCode,
+)
+
+LISTING = "```python\n# a.py\nprint('a')\n```\n"
+CHANGED = "```python\n# a.py\nprint('b')\n```\n"
+NOTE = "%%\nNote\n%%\n"
+
+
+def test_planned_edits_are_committed_together(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text("Text\n" + LISTING + LISTING)
+    md_file = MarkdownFile(md)
+    first, second = md_file.code_listings()
+    md_file.plan_insert(first, Comment(NOTE))
+    md_file.plan_insert(second, Comment(NOTE))
+    md_file.plan_replace(second, SourceCode(CHANGED))
+    assert md.read_text() == "Text\n" + LISTING + LISTING
+    md_file.commit_edits()
+    assert md_file.edits == []
+    assert md.read_text() == (
+        "Text\n" + NOTE + LISTING + NOTE + CHANGED
+    )
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_show_edits(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text("Text\n" + LISTING + LISTING)
+    md_file = MarkdownFile(md)
+    md_file.plan_insert(md_file.code_listings()[1], Comment(NOTE))
+    with console.capture() as capture:
+        md_file.show_edits()
+    assert capture.get() == (
+        "chapter.md line 6: Insert before ```python\n" + NOTE
+    )
+    assert md.read_text() == "Text\n" + LISTING + LISTING
+
+
+def test_dry_run_writes_and_deletes_nothing(tmp_path: Path):
+    (tmp_path / "a.py").write_text("# a.py\n")
+    md = tmp_path / "chapter.md"
+    text = f"%%\npath: {tmp_path.as_posix()}\n%%\n" + LISTING
+    md.write_text(text)
+    tmp_md = tmp_path / "chapter.tmp.md"
+    tmp_md.write_text("Earlier\n")
+    with console.capture() as capture:
+        insert_codepath_tags(md, dry_run=True)
+    assert "Would delete" in capture.get()
+    assert tmp_md.read_text() == "Earlier\n"
+    assert md.read_text() == text
+
+
+def test_a_part_is_only_replaced_once(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text("Text\n" + LISTING)
+    md_file = MarkdownFile(md)
+    (listing,) = md_file.code_listings()
+    md_file.plan_replace(listing, SourceCode(CHANGED))
+    md_file.plan_replace(listing, SourceCode(LISTING))
+    with pytest.raises(SystemExit):
+        md_file.commit_edits()
+    assert md.read_text() == "Text\n" + LISTING
@@ -0,0 +1,187 @@
+# test_error_reporter.py
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from markdown_tools.error_reporter import (
+    CallTracker,
+    CheckFailure,
+    call_track,
+    check,
+    collect,
+    keep_going,
+    set_keep_going,
+    set_trace_mode,
+)
+
+
+class Traced(metaclass=CallTracker):
+    def method(self, n: int) -> int:
+        return n
+
+
+@call_track
+def traced_function(n: int) -> int:
+    return n
+
+
+@pytest.fixture
+def trace_mode():
+    yield set_trace_mode
+    set_trace_mode("off")
+
+
+def test_tracing_off_installs_no_wrapper(trace_mode):
+    trace_mode("off")
+    assert Traced.__dict__["method"].__name__ == "method"
+    Traced().method(1)
+    assert len(check.trace) == 0
+
+
+def test_tracked_functions_are_only_wrapped_when_on(trace_mode):
+    original = traced_function
+    assert not hasattr(original, "__wrapped__")
+    trace_mode("on")
+    assert traced_function.__wrapped__ is original
+    traced_function(1)
+    assert str(check).splitlines()[-1] == "traced_function(1)"
+    trace_mode("off")
+    assert traced_function is original
+
+
+def test_tracing_on_records_calls(trace_mode):
+    trace_mode("on")
+    Traced().method(1)
+    Traced().method(2)
+    assert str(check).splitlines()[-2:] == [
+        "Traced.method(1)",
+        "Traced.method(2)",
+    ]
+
+
+def test_ring_keeps_last_n(trace_mode):
+    trace_mode("ring:3")
+    for n in range(10):
+        Traced().method(n)
+    assert str(check).splitlines()[-3:] == [
+        "Traced.method(7)",
+        "Traced.method(8)",
+        "Traced.method(9)",
+    ]
+
+
+def test_sample_records_every_nth(trace_mode):
+    trace_mode("sample:4")
+    for n in range(8):
+        Traced().method(n)
+    assert str(check).splitlines()[-2:] == [
+        "Traced.method(3)",
+        "Traced.method(7)",
+    ]
+
+
+def test_trace_resets_when_a_file_is_started(trace_mode):
+    trace_mode("on")
+    check.start_file(Path("a.md"))
+    Traced().method(1)
+    check.input_file = Path("b.md")
+    assert len(check.trace) == 1
+    check.start_file(Path("b.md"))
+    assert len(check.trace) == 0
+    check.input_file = None
+
+
+def test_report_keeps_the_calls_that_opened_the_file(
+    trace_mode, tmp_path: Path
+):
+    from markdown_tools.markdown_file import MarkdownFile
+
+    trace_mode("on")
+    md = tmp_path / "a.md"
+    md.write_text("# A\n```\ncode\n```\n", encoding="utf-8")
+    set_keep_going(True)
+    try:
+        failure = collect(MarkdownFile, md)
+    finally:
+        set_keep_going(False)
+        check.input_file = None
+    assert isinstance(failure, CheckFailure)
+    assert "MarkdownFile.__init__" in failure.report
+
+
+def test_invalid_trace_mode():
+    with pytest.raises(ValueError):
+        set_trace_mode("ring")
+    with pytest.raises(ValueError):
+        set_trace_mode("everything")
+
+
+def test_keep_going_raises_check_failure():
+    set_keep_going(True)
+    try:
+        check.input_file = Path("a.md")
+        check.current_line_number = 3
+        with pytest.raises(CheckFailure) as raised:
+            check.error("Broken\n")
+    finally:
+        set_keep_going(False)
+        check.input_file = None
+    # Workers send their failures back to the parent in a pickle:
+    failure = pickle.loads(pickle.dumps(raised.value))
+    assert (failure.file, failure.line) == (Path("a.md"), 3)
+    assert failure.message == "Broken"
+    assert "Input file: a.md" in failure.report
+
+
+def test_collect_returns_the_failure():
+    def fail(md: Path) -> None:
+        check.error(f"{md} failed")
+
+    set_keep_going(True)
+    try:
+        failure = collect(fail, Path("a.md"))
+    finally:
+        set_keep_going(False)
+    assert isinstance(failure, CheckFailure)
+    assert failure.message == "a.md failed"
+    with pytest.raises(SystemExit):
+        collect(fail, Path("a.md"))
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("1", True), ("True", True), ("on", True), ("0", False)]
+    + [("false", False), ("no", False), ("", False)],
+)
+def test_keep_going_parses_the_variable(
+    value: str, expected: bool, monkeypatch
+):
+    monkeypatch.setenv("MT_KEEP_GOING", value)
+    assert keep_going() == expected
+
+
+TRACED_AT_IMPORT = """
+from markdown_tools.error_reporter import check, set_trace_mode
+from markdown_tools.markdown_file import Markdown
+repr(Markdown("x"))
+print(*[frame[1] for frame in check.trace])
+set_trace_mode("off")
+check.trace.clear()
+repr(Markdown("x"))
+print(len(check.trace))
+"""
+
+
+def test_slotted_classes_traced_at_import_are_wrapped_once():
+    # Tracing must be on before markdown_file is imported:
+    output = subprocess.run(
+        [sys.executable, "-c", TRACED_AT_IMPORT],
+        cwd=Path(__file__).parent.parent,
+        env=dict(os.environ, MT_TRACE="on"),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.splitlines() == ["__init__ __repr__", "0"]
@@ -0,0 +1,21 @@
+# test_import_time.py
+from benchmarks.bench_import import import_times, own_us
+
+# tools.py and markdown_tools used to take about 70 ms to import:
+OWN_IMPORT_BUDGET_US = 25_000
+
+
+def test_startup_imports_no_command_modules():
+    times = import_times()
+    for module in (
+        "markdown_tools.markdown_file",
+        "markdown_tools.compare_strings",
+        "markdown_tools.parallel",
+        "readchar",
+        "difflib",
+    ):
+        assert module not in times
+
+
+def test_startup_import_budget():
+    assert own_us(import_times()) < OWN_IMPORT_BUDGET_US
@@ -0,0 +1,39 @@
+# test_incremental.py
+from pathlib import Path
+import pytest
+from markdown_tools.incremental import RunState
+
+
+def processor(md: Path) -> None:
+    pass
+
+
+@pytest.fixture
+def md(tmp_path: Path, make_book) -> Path:
+    make_book({"chapter.md": ["a.py"]})
+    return tmp_path / "chapter.md"
+
+
+def test_clean_file_is_skipped_until_it_changes(md: Path):
+    state = RunState(processor)
+    assert state.changed([md]) == [md]
+    state.update(md, clean=True)
+    state.save()
+    assert RunState(processor).changed([md]) == []
+    md.write_text(md.read_text() + "More\n", encoding="utf-8")
+    assert RunState(processor).changed([md]) == [md]
+
+
+def test_source_change_is_detected(tmp_path: Path, md: Path):
+    state = RunState(processor)
+    state.update(md, clean=True)
+    assert state.unchanged(md)
+    (tmp_path / "code" / "a.py").write_text("# a.py\nprint('b')\n")
+    assert not state.unchanged(md)
+
+
+def test_unclean_file_is_forgotten(md: Path):
+    state = RunState(processor)
+    state.update(md, clean=True)
+    state.update(md, clean=False)
+    assert not state.unchanged(md)
@@ -0,0 +1,41 @@
+# test_index_of.py
+from pathlib import Path
+from markdown_tools.markdown_file import MarkdownFile, SourceCode
+from markdown_tools.update_examples import (
+    update_examples_from_source_code,
+)
+
+LISTING = "```python\n# a.py\nprint('a')\n```\n"
+
+
+def test_identical_listings_have_their_own_positions(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text("Text\n" + LISTING + "Text\n" + LISTING)
+    md_file = MarkdownFile(md)
+    first, second = md_file.code_listings()
+    assert first == second
+    assert md_file.index_of(first) == 1
+    assert md_file.index_of(second) == 3
+    md_file.insert(0, SourceCode(LISTING))
+    assert md_file.index_of(second) == 4
+    md_file[4] = replacement = SourceCode(LISTING)
+    assert md_file.index_of(replacement) == 4
+    assert md_file.index_of(second) == -1
+
+
+def test_update_replaces_the_right_identical_listing(tmp_path: Path):
+    sources = [("one", "print('a')\n"), ("two", "new\n")]
+    for directory, text in sources:
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "a.py").write_text("# a.py\n" + text)
+    md = tmp_path / "chapter.md"
+    md.write_text(
+        f"%%\npath: {(tmp_path / 'one').as_posix()}\n%%\n"
+        + LISTING
+        + f"%%\npath: {(tmp_path / 'two').as_posix()}\n%%\n"
+        + LISTING
+    )
+    update_examples_from_source_code(md, yes=True)
+    first, second = MarkdownFile(md).code_listings()
+    assert first.code == "# a.py\nprint('a')\n"
+    assert second.code == "# a.py\nnew\n"
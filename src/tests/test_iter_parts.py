@@ -0,0 +1,63 @@
+# test_iter_parts.py
+from pathlib import Path
+import pytest
+from markdown_tools import markdown_file, parse_cache
+from markdown_tools.markdown_file import MarkdownFile
+
+CHAPTER = (
+    "# Title\n\n%%\nA comment\n%%\n"
+    + "%%\npath: code\n%%\n"
+    + "```python\n# a.py\nprint('a')\n```\n"
+    + "Text\n```text\noutput\n```\n"
+)
+
+
+def test_streamed_parts_match_parsed_parts(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    streamed = list(MarkdownFile.iter_parts(md))
+    assert "".join(map(repr, streamed)) == CHAPTER
+    assert list(map(repr, streamed)) == list(
+        map(repr, MarkdownFile(md))
+    )
+
+
+def test_unchanged_file_is_not_read(tmp_path: Path, monkeypatch):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    parsed = list(map(repr, MarkdownFile(md)))
+
+    def fail(*args):
+        raise AssertionError("read an unchanged file")
+
+    monkeypatch.setattr(markdown_file, "StreamingScanner", fail)
+    assert list(map(repr, MarkdownFile.iter_parts(md))) == parsed
+
+
+def test_changed_file_is_streamed(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    MarkdownFile(md)
+    md.write_text(CHAPTER + "More\n", encoding="utf-8")
+    parts = list(MarkdownFile.iter_parts(md))
+    assert repr(parts[-1]) == "More\n"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        CHAPTER,
+        "# Title\n\nText\x0c```text\noutput\n```\n",
+        "Intro\n%%\x85path: code\x85%%\u2028```text\nout\n```\n",
+        "Text\x1c%%\nNote\x1d%%\n```python\n# a.py\n```\x1e",
+    ],
+)
+def test_streaming_splits_lines_like_parsing(tmp_path: Path, text):
+    md = tmp_path / "chapter.md"
+    md.write_text(text, encoding="utf-8")
+    parse_cache.set_enabled(False)
+    try:
+        streamed = list(MarkdownFile.iter_parts(md))
+    finally:
+        parse_cache.set_enabled(True)
+    assert streamed == MarkdownFile(md).contents
@@ -0,0 +1,76 @@
+# test_languages.py
+import json
+from pathlib import Path
+import pytest
+from markdown_tools.languages import load_languages
+
+
+def write_config(tmp_path: Path, entries) -> Path:
+    config = tmp_path / "languages.json"
+    config.write_text(json.dumps(entries), encoding="utf-8")
+    return config
+
+
+def test_lookup_by_name_extension_and_alias(tmp_path: Path):
+    languages = load_languages(tmp_path / "missing.json")
+    python = languages["python"]
+    assert languages[".py"] is python
+    assert languages["py"] is python
+    assert "rs" in languages
+    assert "kotlin" not in languages
+    with pytest.raises(KeyError):
+        languages["kotlin"]
+
+
+def test_config_changes_and_adds_languages(tmp_path: Path):
+    languages = load_languages(
+        write_config(
+            tmp_path,
+            [
+                {"language": "python", "start_search": "/book/python"},
+                {
+                    "language": "kotlin",
+                    "file_extension": ".kt",
+                    "comment_symbol": "//",
+                    "start_search": "/book/kotlin",
+                    "aliases": ["kt"],
+                },
+            ],
+        )
+    )
+    assert languages["py"].start_search == "/book/python"
+    assert languages["py"].comment_symbol == "#"
+    assert languages["kt"] is languages[".kt"]
+    assert len(languages.languages) == 5
+
+
+def test_config_key_already_used(tmp_path: Path):
+    config = write_config(
+        tmp_path,
+        [
+            {
+                "language": "python3",
+                "file_extension": ".py",
+                "comment_symbol": "#",
+                "start_search": "",
+            }
+        ],
+    )
+    with pytest.raises(SystemExit):
+        load_languages(config)
+
+
+def test_config_name_is_another_languages_alias(tmp_path: Path):
+    config = write_config(
+        tmp_path,
+        [
+            {
+                "language": "py",
+                "file_extension": ".pyw",
+                "comment_symbol": "#",
+                "start_search": "",
+            }
+        ],
+    )
+    with pytest.raises(SystemExit):
+        load_languages(config)
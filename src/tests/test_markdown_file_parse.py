@@ -70,3 +70,24 @@ class TestParse:
     #     assert isinstance(parsed_contents[0], SourceCode)
     #     assert parsed_contents[0].language == ""
     #     assert parsed_contents[0].code == "print('Hello, World!')"
+
+    # The single-pass tokenizer produces the same parts as parse()
+    def test_tokenize_matches_parse(self, tmp_path):
+        md = tmp_path / "chapter.md"
+        md.write_text(
+            "# Title\r\n\r\nText\n%% not a comment\n"
+            "%%\npath: /path/to/code\n%%\n"
+            "```python\n# a.py\nprint('a')\n```\n"
+            "Between\x0c```text\noutput\n```\n"
+            "%%\nPlain\n%%  \nEnd",
+            encoding="utf-8",
+            newline="",
+        )
+        parsed = list(MarkdownFile.parse(MarkdownScanner(md)))
+        tokenized = list(
+            MarkdownFile.tokenize(md.read_text(encoding="utf-8"))
+        )
+        assert [type(part) for part in tokenized] == [
+            type(part) for part in parsed
+        ]
+        assert list(map(repr, tokenized)) == list(map(repr, parsed))
@@ -0,0 +1,70 @@
+# test_parallel.py
+from pathlib import Path
+from typing import List
+import pytest
+from markdown_tools.console import console
+from markdown_tools.error_reporter import check
+from markdown_tools.markdown_file import MarkdownFile
+from markdown_tools.parallel import map_files, run_captured
+
+# Processors run in worker processes, so they're module-level:
+
+
+def shout(md: Path) -> str:
+    console.print(f"{md.name} [OK]")
+    return md.stem.upper()
+
+
+def fail_on_c(md: Path) -> str:
+    if md.stem == "c":
+        check.error(f"{md.name} failed")
+    return shout(md)
+
+
+def make_files(tmp_path: Path) -> List[Path]:
+    files = []
+    for name in "abcd":
+        md = tmp_path / f"{name}.md"
+        md.write_text(f"# {name}\n", encoding="utf-8")
+        files.append(md)
+    return files
+
+
+def test_results_and_output_in_file_order(tmp_path: Path):
+    files = make_files(tmp_path)
+    with console.capture() as capture:
+        results = list(map_files(shout, files, jobs=2))
+    assert results == ["A", "B", "C", "D"]
+    assert capture.get().splitlines() == [
+        f"{name}.md [OK]" for name in "abcd"
+    ]
+
+
+def test_first_failure_stops_the_run(tmp_path: Path):
+    files = make_files(tmp_path)
+    results = []
+    with console.capture() as capture:
+        with pytest.raises(SystemExit) as stopped:
+            for result in map_files(fail_on_c, files, jobs=2):
+                results.append(result)
+    assert stopped.value.code == 1
+    assert results == ["A", "B"]
+    output = capture.get()
+    assert "c.md failed" in output
+    assert "d.md" not in output
+
+
+def test_parsed_files_are_pickled_back(tmp_path: Path):
+    files = make_files(tmp_path)
+    parsed = list(map_files(MarkdownFile, files, jobs=2))
+    assert [md_file.contents for md_file in parsed] == [
+        MarkdownFile(md).contents for md in files
+    ]
+
+
+def test_run_captured(tmp_path: Path):
+    md = make_files(tmp_path)[2]
+    assert run_captured(shout, md) == ("c.md [OK]\n", "C", None)
+    output, result, exit_code = run_captured(fail_on_c, md)
+    assert "c.md failed" in output
+    assert (result, exit_code) == (None, 1)
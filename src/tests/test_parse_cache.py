@@ -0,0 +1,71 @@
+# test_parse_cache.py
+import os
+from dataclasses import replace
+from pathlib import Path
+from markdown_tools import parse_cache
+from markdown_tools.languages import LANGUAGES
+from markdown_tools.markdown_file import MarkdownFile, SourceCode
+
+CHAPTER = "# Title\n\n```python\n# a.py\nprint('a')\n```\n"
+
+
+def test_unchanged_file_uses_cache(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    parsed = MarkdownFile(md).contents
+    cached = parse_cache.load(md, CHAPTER)
+    assert cached is not None
+    assert list(map(repr, cached)) == list(map(repr, parsed))
+    assert isinstance(cached[1], SourceCode)
+    assert cached[1].source_file_name == "a.py"
+
+
+def test_touched_file_matches_by_hash(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    MarkdownFile(md)
+    os.utime(md, ns=(0, 0))
+    assert parse_cache.load(md, CHAPTER) is not None
+
+
+def test_changed_file_is_parsed(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    MarkdownFile(md)
+    md.write_text(CHAPTER + "More\n", encoding="utf-8")
+    assert parse_cache.load(md, md.read_text(encoding="utf-8")) is None
+    assert repr(MarkdownFile(md).contents[-1]) == "More\n"
+
+
+def test_same_size_edit_with_same_mtime_is_parsed(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    MarkdownFile(md)
+    stat = md.stat()
+    md.write_text(CHAPTER.replace("'a'", "'b'"), encoding="utf-8")
+    os.utime(md, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert "print('b')" in repr(MarkdownFile(md).contents[1])
+
+
+def test_other_languages_config_is_parsed(
+    tmp_path: Path, monkeypatch
+):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    MarkdownFile(md)
+    changed = [
+        replace(info, start_search=str(tmp_path))
+        for info in LANGUAGES.languages
+    ]
+    monkeypatch.setattr(LANGUAGES, "languages", changed)
+    assert parse_cache.load(md, CHAPTER) is None
+    assert parse_cache.load_unchanged(md) is None
+
+
+def test_corrupt_cache_falls_back_to_parse(tmp_path: Path):
+    md = tmp_path / "chapter.md"
+    md.write_text(CHAPTER, encoding="utf-8")
+    MarkdownFile(md)
+    parse_cache._cache_file(md).write_bytes(b"not a pickle")
+    assert parse_cache.load(md, CHAPTER) is None
+    assert len(MarkdownFile(md)) == 2
@@ -0,0 +1,45 @@
+# test_parts.py
+import pytest
+from markdown_tools.markdown_file import (
+    CodePath,
+    Comment,
+    MarkdownFile,
+    SourceCode,
+)
+
+CHAPTER = (
+    "Text\n%%\npath: code\n%%\n"
+    + "```python\n# a.py\nprint('a')\n```\n"
+    + "%%\nA comment\n%%"
+)
+
+
+def test_parts_round_trip_without_instance_dicts():
+    parts = list(MarkdownFile.tokenize(CHAPTER))
+    assert "".join(map(repr, parts)) == CHAPTER
+    for part in parts:
+        assert not hasattr(part, "__dict__")
+
+
+def test_views_are_derived_from_the_text():
+    parts = list(MarkdownFile.tokenize(CHAPTER))
+    code_path, listing, comment = parts[1], parts[2], parts[3]
+    assert isinstance(code_path, CodePath)
+    assert code_path.path == "code"
+    assert isinstance(listing, SourceCode)
+    assert listing.code == "# a.py\nprint('a')\n"
+    assert isinstance(comment, Comment)
+    assert comment.comment == ["%%\n", "A comment\n", "%%"]
+    assert comment[1] == "A comment\n"
+
+
+@pytest.mark.parametrize(
+    "ending",
+    ["\n", "\r\n", "\r", "\v", "\f", "\x1c", "\x1d", "\x1e"]
+    + ["\x85", "\u2028", "\u2029"],
+)
+def test_comment_round_trips_every_line_ending(ending: str):
+    text = f"Intro\n%%{ending}Note{ending}more\n%%\n"
+    parts = list(MarkdownFile.tokenize(text))
+    assert isinstance(parts[1], Comment)
+    assert "".join(map(repr, parts)) == text
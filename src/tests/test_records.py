@@ -0,0 +1,116 @@
+# test_records.py
+import json
+from dataclasses import replace
+from pathlib import Path
+import pytest
+from markdown_tools import compare_strings, records
+from markdown_tools.console import console
+from markdown_tools.edit_changed_examples import edit_example_changes
+from markdown_tools.error_reporter import check
+from markdown_tools.insert_codepath_tags import (
+    insert_codepath_tags,
+    validate_codepath_tags,
+)
+from markdown_tools.languages import LANGUAGES
+
+LISTING = "```python\n# a.py\nprint('a')\n```\n"
+
+
+@pytest.fixture
+def json_lines(monkeypatch):
+    monkeypatch.setenv("MT_FORMAT", "rich")
+    records.set_format("jsonl")
+    yield
+    records.set_format("rich")
+
+
+def loads(lines):
+    return [json.loads(line) for line in lines]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        records.set_format("xml")
+
+
+def test_emit_writes_paths_in_posix_form(json_lines):
+    with records.capture() as lines:
+        records.emit("rename", original=Path("a") / "b.md", new=None)
+    assert loads(lines) == [
+        {"kind": "rename", "original": "a/b.md", "new": None}
+    ]
+    assert console.quiet
+
+
+def test_codepath_records(tmp_path: Path, json_lines):
+    (tmp_path / "a.py").write_text("# a.py\n", encoding="utf-8")
+    md = tmp_path / "chapter.md"
+    md.write_text(
+        LISTING + f"%%\npath: {tmp_path.as_posix()}\n%%\n" + LISTING,
+        encoding="utf-8",
+    )
+    with records.capture() as lines:
+        assert validate_codepath_tags(md) == 1
+    missing, valid = loads(lines)
+    assert missing == {
+        "kind": "codepath",
+        "file": md.as_posix(),
+        "line": 1,
+        "listing": "a.py",
+        "path": None,
+        "status": "missing",
+    }
+    assert valid["line"] == 8
+    assert valid["status"] == "valid"
+
+
+def test_error_record(json_lines):
+    with records.capture() as lines:
+        with pytest.raises(SystemExit):
+            check.error("Broken\n")
+    (error,) = loads(lines)
+    assert error["kind"] == "error"
+    assert error["message"] == "Broken"
+
+
+def test_diff_record(tmp_path: Path, json_lines, monkeypatch):
+    (tmp_path / "a.py").write_text("# a.py\nprint('b')\n")
+    md = tmp_path / "chapter.md"
+    md.write_text(
+        f"Text\n%%\npath: {tmp_path.as_posix()}\n%%\n" + LISTING,
+        encoding="utf-8",
+    )
+    runs = []
+
+    def engine(a, b):
+        runs.append(1)
+        return compare_strings.differ_diff(a, b)
+
+    monkeypatch.setitem(compare_strings.DIFF_ENGINES, "auto", engine)
+    with records.capture() as lines:
+        edit_example_changes(md)
+    (diff,) = loads(lines)
+    assert diff["line"] == 5
+    assert diff["status"] == "content"
+    assert (diff["added"], diff["removed"]) == (1, 1)
+    assert len(runs) == 1
+
+
+def test_insert_records(tmp_path: Path, json_lines, monkeypatch):
+    (tmp_path / "a.py").write_text("# a.py\nprint('a')\n")
+    python = replace(LANGUAGES["python"], start_search=str(tmp_path))
+    monkeypatch.setitem(LANGUAGES.by_key, "python", python)
+    md = tmp_path / "chapter.md"
+    md.write_text("Text\n" + LISTING, encoding="utf-8")
+    with records.capture() as lines:
+        insert_codepath_tags(md, dry_run=True)
+    assert loads(lines) == [
+        {
+            "kind": "insert",
+            "file": md.as_posix(),
+            "line": 2,
+            "listing": "a.py",
+            "path": tmp_path.as_posix() + "/",
+            "inserted": False,
+        }
+    ]
@@ -0,0 +1,83 @@
+# test_server.py
+import os
+import threading
+from pathlib import Path
+import pytest
+from markdown_tools import client, parse_cache
+from markdown_tools.server import Server
+
+CHAPTER = "# Title\n\nSome text\n"
+
+
+@pytest.fixture
+def server(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.md").write_text(CHAPTER, encoding="utf-8")
+    (tmp_path / "b.md").write_text(CHAPTER, encoding="utf-8")
+    with Server(tmp_path) as server:
+        server.warm()
+        server.publish()
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+    parse_cache.keep_in_memory(False)
+
+
+def test_check_all_files(server: Server):
+    reply = client.request(["1"])
+    assert reply == {
+        "served": True,
+        "output": "a.md [OK]\nb.md [OK]\n",
+        "exit_code": 0,
+    }
+
+
+def test_edits_are_seen(server: Server):
+    reply = client.request(["1", "a.md"])
+    assert reply is not None and reply["output"] == "a.md [OK]\n"
+    Path("a.md").write_text(CHAPTER + "```\ncode\n```\n")
+    reply = client.request(["1", "a.md"])
+    assert reply is not None and reply["exit_code"] == 1
+    assert "Language cannot be empty" in reply["output"]
+
+
+def test_other_commands_are_not_served(server: Server):
+    assert client.request(["5"]) == {"served": False}
+    assert client.request(["1", "--jobs", "4"]) == {"served": False}
+
+
+@pytest.mark.parametrize(
+    "name, value",
+    [("MT_FORMAT", "jsonl"), ("MT_KEEP_GOING", "1")]
+    + [("MT_TRACE", "on"), ("MT_NO_CACHE", "1")],
+)
+def test_other_settings_are_not_served(
+    server: Server, name: str, value: str, monkeypatch
+):
+    assert client.request(["1"]) != {"served": False}
+    # The server and client share os.environ, so only the message
+    # the client sends can differ:
+    different = dict(client.SETTINGS, **{name: value})
+    monkeypatch.setattr(client, "settings", lambda: different)
+    assert client.request(["1"]) == {"served": False}
+
+
+def test_no_server(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert client.request(["1"]) is None
+
+
+def test_files_outside_root_are_not_served(
+    server: Server, tmp_path: Path
+):
+    outside = tmp_path.parent / "outside.md"
+    assert client.request(["1", str(outside)]) == {"served": False}
+    assert client.request(["1", "../outside.md"]) == {"served": False}
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_address_file_is_private(server: Server, tmp_path: Path):
+    address = client.address_file(tmp_path)
+    assert address.stat().st_mode & 0o777 == 0o600
@@ -0,0 +1,56 @@
+# test_source_index.py
+from pathlib import Path
+import pytest
+from markdown_tools import source_index as si
+
+
+@pytest.fixture
+def tree(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setenv("MT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(si, "_indexes", {})
+    root = tmp_path / "experiments"
+    (root / "a").mkdir(parents=True)
+    (root / "b" / "sub").mkdir(parents=True)
+    (root / "a" / "one.py").write_text("# one.py\n")
+    (root / "b" / "one.py").write_text("# one.py\n")
+    (root / "b" / "sub" / "two.py").write_text("# two.py\n")
+    return root
+
+
+def test_find(tree: Path):
+    index = si.SourceIndex(tree)
+    assert index.find("two.py") == [tree / "b" / "sub" / "two.py"]
+    assert index.find("sub/two.py") == [tree / "b" / "sub" / "two.py"]
+    assert index.find("one.py") == [
+        tree / "a" / "one.py",
+        tree / "b" / "one.py",
+    ]
+    assert index.find("missing.py") == []
+    assert index.contains(tree / "a" / "one.py")
+    assert not index.contains(tree / "a" / "two.py")
+
+
+def test_cached_index_is_reused(tree: Path):
+    index = si.source_index(tree)
+    si._indexes.clear()
+    cached = si.source_index(tree)
+    assert cached is not index  # Loaded from the cache file
+    assert cached.files == index.files
+
+
+def test_index_rebuilt_when_tree_changes(tree: Path):
+    si.source_index(tree)
+    si._indexes.clear()
+    (tree / "a" / "three.py").write_text("# three.py\n")
+    assert si.source_index(tree).find("three.py") == [
+        tree / "a" / "three.py"
+    ]
+
+
+def test_forget_checks_the_index_again(tree: Path):
+    two = tree / "b" / "sub" / "two.py"
+    assert si.source_index(tree).contains(two)
+    two.unlink()
+    assert si.source_index(tree).contains(two)  # Kept for this run
+    si.forget()
+    assert not si.source_index(tree).contains(two)
@@ -0,0 +1,61 @@
+# test_source_reader.py
+from pathlib import Path
+from markdown_tools import source_reader
+from markdown_tools.markdown_file import MarkdownFile
+from markdown_tools.source_reader import (
+    listings_with_sources,
+    read_sources,
+)
+
+
+def test_read_sources(tmp_path: Path):
+    paths = [tmp_path / f"{n}.py" for n in range(4)]
+    for path in paths:
+        path.write_text(f"# {path.name}\n", encoding="utf-8")
+    missing = tmp_path / "missing.py"
+    texts = read_sources(paths + paths[:2] + [missing])
+    assert list(texts) == paths + [missing]
+    assert texts[paths[3]] == "# 3.py\n"
+    assert texts[missing] is None
+
+
+def test_listings_with_sources(tmp_path: Path):
+    code = tmp_path / "code"
+    code.mkdir()
+    (code / "a.py").write_text("# a.py\n", encoding="utf-8")
+    md = tmp_path / "chapter.md"
+    md.write_text(
+        f"%%\npath: {code.as_posix()}\n%%\n"
+        + "```python\n# a.py\n```\n```python\n# b.py\n```\n",
+        encoding="utf-8",
+    )
+    listings = list(listings_with_sources(MarkdownFile(md)))
+    assert [(path.name, text) for _, path, text in listings] == [
+        ("a.py", "# a.py\n"),
+        ("b.py", None),
+    ]
+    only_b = listings_with_sources(MarkdownFile(md), code / "b.py")
+    assert [path.name for _, path, _ in only_b] == ["b.py"]
+
+
+def test_matching_sources_are_not_read(tmp_path: Path, monkeypatch):
+    code = tmp_path / "code"
+    code.mkdir()
+    (code / "a.py").write_text("# a.py\n", encoding="utf-8")
+    (code / "b.py").write_text("# b.py\nchanged\n", encoding="utf-8")
+    md = tmp_path / "chapter.md"
+    md.write_text(
+        f"%%\npath: {code.as_posix()}\n%%\n"
+        + "```python\n# a.py\n```\n```python\n# b.py\n```\n",
+        encoding="utf-8",
+    )
+    list(listings_with_sources(MarkdownFile(md)))  # Records digests
+    read = []
+    monkeypatch.setattr(
+        source_reader, "_read", lambda path: read.append(path.name)
+    )
+    texts = [
+        text for _, _, text in listings_with_sources(MarkdownFile(md))
+    ]
+    assert read == ["b.py"]  # a.py matched its digest
+    assert texts == ["# a.py\n", None]
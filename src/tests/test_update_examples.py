@@ -0,0 +1,22 @@
+# test_update_examples.py
+from pathlib import Path
+from markdown_tools.console import console
+from markdown_tools.update_examples import (
+    update_examples_from_source_code,
+)
+
+LISTING = "```python\n# a.py\nprint('a')\n```\n"
+
+
+def test_dry_run_with_yes_only_reports(tmp_path: Path):
+    (tmp_path / "a.py").write_text("# a.py\nnew\n")
+    md = tmp_path / "chapter.md"
+    md.write_text(f"%%\npath: {tmp_path.as_posix()}\n%%\n" + LISTING)
+    with console.capture() as capture:
+        unchanged = update_examples_from_source_code(
+            md, yes=True, dry_run=True
+        )
+    assert unchanged == 1
+    assert "Would replace a.py" in capture.get()
+    assert "No changes" not in capture.get()
+    assert md.read_text().endswith(LISTING)
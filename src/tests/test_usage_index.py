@@ -0,0 +1,57 @@
+# test_usage_index.py
+from pathlib import Path
+import pytest
+from markdown_tools.error_reporter import set_keep_going
+from markdown_tools.usage_index import Usage, UsageIndex
+
+
+@pytest.fixture
+def source(make_book) -> Path:
+    "a.md's second listing and b.md's only listing are from code/a.py"
+    code = make_book(
+        {"a.md": ["b.py", "a.py"], "b.md": ["a.py"]},
+        {"a.py": "# a.py\nprint('a')\n", "b.py": "# b.py\n"},
+    )
+    return code / "a.py"
+
+
+def test_uses(tmp_path: Path, source: Path):
+    assert UsageIndex(tmp_path).uses(source) == [
+        Usage(tmp_path / "a.md", 2),
+        Usage(tmp_path / "b.md", 1),
+    ]
+    assert UsageIndex(tmp_path).uses(tmp_path / "missing.py") == []
+
+
+def test_only_changed_chapters_are_indexed(
+    tmp_path: Path, source: Path, monkeypatch
+):
+    UsageIndex(tmp_path)
+    indexed = []
+    index = UsageIndex.index
+
+    def record(self, md: Path, stamp) -> None:
+        indexed.append(md)
+        index(self, md, stamp)
+
+    monkeypatch.setattr(UsageIndex, "index", record)
+    (tmp_path / "b.md").write_text("# B\n", encoding="utf-8")
+    loaded = UsageIndex(tmp_path)  # Loaded from the cache
+    assert indexed == [tmp_path / "b.md"]
+    assert loaded.chapters_using(source) == [tmp_path / "a.md"]
+
+
+def test_keep_going_skips_chapters_that_fail(
+    tmp_path: Path, source: Path
+):
+    (tmp_path / "c.md").write_text("%%\nUnclosed\n", encoding="utf-8")
+    set_keep_going(True)
+    try:
+        index = UsageIndex(tmp_path)
+    finally:
+        set_keep_going(False)
+    assert "c.md" not in index.chapters
+    assert index.uses(source) == [
+        Usage(tmp_path / "a.md", 2),
+        Usage(tmp_path / "b.md", 1),
+    ]
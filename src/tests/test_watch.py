@@ -0,0 +1,68 @@
+# test_watch.py
+import os
+from pathlib import Path
+import pytest
+from markdown_tools import watch
+from markdown_tools.console import console
+from markdown_tools.error_reporter import set_keep_going
+from markdown_tools.markdown_file import MarkdownFile
+
+
+@pytest.fixture
+def source(make_book) -> Path:
+    "Two chapters; only a.md has a listing from code/a.py"
+    return make_book({"a.md": ["a.py"], "b.md": "# B\n"}) / "a.py"
+
+
+def test_diff_listings(tmp_path: Path, source: Path):
+    source.write_text("# a.py\nprint('b')\n", encoding="utf-8")
+    with console.capture() as capture:
+        watch.diff_listings(tmp_path / "a.md", source)
+    assert "print('b')" in capture.get()
+
+
+def test_show_displays_a_kept_failure(tmp_path: Path):
+    md = tmp_path / "a.md"
+    md.write_text("%%\nUnclosed\n", encoding="utf-8")
+    set_keep_going(True)
+    try:
+        with console.capture() as capture:
+            watch._show(MarkdownFile, md)
+    finally:
+        set_keep_going(False)
+    assert "Unclosed markdown comment" in capture.get()
+
+
+@pytest.mark.parametrize(
+    "watcher", [watch.PollingWatcher, watch.InotifyWatcher]
+)
+def test_watcher_reports_changes(
+    tmp_path: Path, source: Path, watcher
+):
+    try:
+        watching = watcher([tmp_path])
+    except OSError:
+        pytest.skip("inotify is unavailable")
+    if isinstance(watching, watch.PollingWatcher):
+        watching.interval = 0.01
+    with watching:
+        source.write_text("# a.py\nprint('b')\n", encoding="utf-8")
+        os.utime(source, ns=(0, 0))  # Polling needs a different stamp
+        (tmp_path / "new").mkdir()
+        assert watching.changes(debounce=0.05) == {str(source)}
+        created = tmp_path / "new" / "c.md"
+        created.write_text("# C\n")
+        assert str(created) in watching.changes(0.05)
+
+
+def test_inotify_watcher_closes_its_descriptor(tmp_path: Path):
+    try:
+        watching = watch.InotifyWatcher([tmp_path])
+    except OSError:
+        pytest.skip("inotify is unavailable")
+    fd = watching.fd
+    with watching:
+        os.fstat(fd)
+    with pytest.raises(OSError):
+        os.fstat(fd)
+    watching.close()  # Closing again does nothing
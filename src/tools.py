@@ -1,27 +1,16 @@
 #: tools.py
 """
 Tests and maintains Markdown files containing embedded code listings.
+Each command imports the modules it needs when it runs, so starting
+`mt` only costs the import of typer.
 """
 import os
-import platform
 import subprocess
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import Any, Callable, Iterator, List, Optional
 
 import typer
-from markdown_tools.check_markdown import check_markdown
 from markdown_tools.console import console
-from markdown_tools.display_comments import display_markdown_comments
-from markdown_tools.edit_changed_examples import edit_example_changes
-from markdown_tools.insert_codepath_tags import (
-    insert_codepath_tags,
-    validate_codepath_tags,
-)
-from markdown_tools.numbered_file import NumberedFile
-from markdown_tools.update_examples import (
-    update_examples_from_source_code,
-)
-from rich.panel import Panel, Text
 from typing_extensions import Annotated
 
 app = typer.Typer(
@@ -32,28 +21,109 @@ app = typer.Typer(
 )
 
 
+Jobs = Annotated[
+    int,
+    typer.Option(
+        "--jobs",
+        "-j",
+        min=0,
+        help="Number of parallel worker processes (0: one per CPU)",
+    ),
+]
+
+
+Changed = Annotated[
+    bool,
+    typer.Option(
+        "--changed",
+        help="Skip files unchanged since they last passed, "
+        "including the source files for their listings",
+    ),
+]
+
+
+Source = Annotated[
+    Optional[Path],
+    typer.Option(
+        "--source",
+        "-s",
+        help="Only the listings taken from this source file",
+    ),
+]
+
+
 def process_files(
     filename: Optional[str],
-    processor: Callable[..., None],
+    processor: Callable[..., Any],
     *args,
-    **kwargs,
-) -> None:
+    jobs: int = 1,
+    changed: bool = False,
+    source: Optional[Path] = None,
+) -> List[Any]:
     """
     Process a single file or all Markdown files in the current directory
-    using the provided processor function.
+    using the provided processor function. Returns the processor results
+    in file order. If jobs is not 1, the files are processed in a pool
+    of worker processes. A processor returns a true value (such as a
+    non-empty list of problems) if the file still needs work; otherwise
+    `changed` skips the file until it or its source files change.
+    `source` limits the files to those with listings taken from it.
+    With --keep-going, a file that fails is left out of the results,
+    and all the failures are reported together at the end.
     """
     if filename:
-        processor(Path(filename), *args, **kwargs)
+        files = [Path(filename)]
     else:
-        for md in Path(".").glob("*.md"):
-            processor(md, *args, **kwargs)
-
+        files = sorted(Path(".").glob("*.md"))
+    if source:
+        if changed:
+            console.print("--changed can't be used with --source")
+            raise typer.Exit(1)
+        from markdown_tools.usage_index import UsageIndex
+
+        using = UsageIndex(Path(".")).chapters_using(source)
+        files = [md for md in files if md in using]
+    state = None
+    if changed:
+        from markdown_tools.incremental import RunState
+
+        state = RunState(processor)
+        files = state.changed(files)
+    from markdown_tools.error_reporter import (
+        CheckFailure,
+        collect,
+        report_failures,
+    )
+
+    results: Iterator[Any]
+    if jobs == 1 or len(files) < 2:
+        results = (collect(processor, md, *args) for md in files)
+    else:
+        from markdown_tools.parallel import map_files
 
-def clear_screen():
-    os.system("cls" if platform.system() == "Windows" else "clear")
+        results = map_files(processor, files, *args, jobs=jobs)
+    outputs: List[Any] = []
+    failures: List[CheckFailure] = []
+    try:
+        for md, result in zip(files, results):
+            if isinstance(result, CheckFailure):
+                failures.append(result)
+            else:
+                outputs.append(result)
+            if state:
+                state.update(md, clean=not result)
+    finally:  # Keep the files that passed before any failure
+        if state:
+            state.save()
+    if failures:
+        report_failures(failures)
+        raise typer.Exit(1)
+    return outputs
 
 
 def display(msg: str, style: str = "green") -> None:
+    from rich.panel import Panel, Text
+
     console.print(Panel(Text(msg, style=style)))
 
 
@@ -80,21 +150,22 @@ def basic(
         typer.Argument(
             help="Markdown file to check (None: all files)"
         ),
-    ] = None
+    ] = None,
+    jobs: Jobs = 1,
+    changed: Changed = False,
 ):
     """
     Basic validation of Markdown files
     """
+    from markdown_tools.check_markdown import display_check_markdown
+
     for tmp_file in Path(".").glob("*.tmp.md"):
         console.print(f"Removing {tmp_file.name}")
         tmp_file.unlink()
 
-    def _check(md: Path):
-        console.print(f"{md.name} ", end="")
-        assert md.exists(), f"{md} does not exist"
-        console.print(check_markdown(md))
-
-    process_files(filename, _check)
+    process_files(
+        filename, display_check_markdown, jobs=jobs, changed=changed
+    )
 
 
 @app.command("2", rich_help_panel="Validation")
@@ -104,10 +175,21 @@ def show_special_comments(
         typer.Argument(
             help="Markdown file to check (None: all files)"
         ),
-    ] = None
+    ] = None,
+    jobs: Jobs = 1,
+    changed: Changed = False,
 ):
     "Display Markdown Comments that follow special format"
-    process_files(filename, display_markdown_comments)
+    from markdown_tools.display_comments import (
+        display_markdown_comments,
+    )
+
+    process_files(
+        filename,
+        display_markdown_comments,
+        jobs=jobs,
+        changed=changed,
+    )
 
 
 @app.command("3", rich_help_panel="Validation")
@@ -117,12 +199,43 @@ def verify_code_paths(
         typer.Argument(
             help="Markdown file to check (None: all files)"
         ),
-    ] = None
+    ] = None,
+    jobs: Jobs = 1,
+    changed: Changed = False,
 ):
     """
     Verify code path comment tags are correct
     """
-    process_files(filename, validate_codepath_tags)
+    from markdown_tools.insert_codepath_tags import (
+        validate_codepath_tags,
+    )
+
+    process_files(
+        filename, validate_codepath_tags, jobs=jobs, changed=changed
+    )
+
+
+@app.command("all", rich_help_panel="Validation")
+def validate_all(jobs: Jobs = 1):
+    """
+    Commands 1, 2 and 3 for every chapter, parsing each file once
+    """
+    from markdown_tools.book import Book, validate_book
+
+    for tmp_file in Path(".").glob("*.tmp.md"):
+        console.print(f"Removing {tmp_file.name}")
+        tmp_file.unlink()
+
+    book = Book(Path("."), jobs=jobs)
+    failures = validate_book(book)
+    if failures:
+        console.print(f"{failures} listings failed validation")
+    if book.failures:
+        from markdown_tools.error_reporter import report_failures
+
+        report_failures(book.failures)
+    if failures or book.failures:
+        raise typer.Exit(1)
 
 
 @app.command("4", rich_help_panel="Validation")
@@ -132,16 +245,33 @@ def vscode_on_changes(
         typer.Argument(
             help="Markdown file to check (None: all files)"
         ),
-    ] = None
+    ] = None,
+    jobs: Jobs = 1,
+    changed: Changed = False,
+    source: Source = None,
 ):
     """
     Opens VSCode on changed examples in source code files
     """
+    from markdown_tools.edit_changed_examples import (
+        edit_example_changes,
+    )
+    from markdown_tools.vscode_open import vscode_open
+
     file_edit_script = Path("edit_changed_files.ps1")
     if file_edit_script.exists():
         file_edit_script.unlink()
 
-    process_files(filename, edit_example_changes, file_edit_script)
+    for changed_files in process_files(
+        filename,
+        edit_example_changes,
+        source,
+        jobs=jobs,
+        changed=changed,
+        source=source,
+    ):
+        for source_file in changed_files:
+            vscode_open(file_edit_script, source_file)
 
     if file_edit_script.exists():
         display(f"Executing {file_edit_script}")
@@ -157,12 +287,67 @@ def update_examples(
         typer.Argument(
             help="Markdown file to check (None: all files)"
         ),
-    ] = None
+    ] = None,
+    yes: Annotated[
+        bool,
+        typer.Option(
+            "--yes", "-y", help="Make every change without prompting"
+        ),
+    ] = False,
+    only_blank_lines: Annotated[
+        bool,
+        typer.Option(
+            "--only-blank-lines",
+            help="Only update examples that differ by blank lines",
+        ),
+    ] = False,
+    dry_run: Annotated[
+        bool,
+        typer.Option(
+            "--dry-run", help="Show the changes without making them"
+        ),
+    ] = False,
+    jobs: Jobs = 1,
+    changed: Changed = False,
+    source: Source = None,
 ):
     """
-    Updates examples in markdown from source code files
+    Updates examples in markdown from source code files.
+    Each file is written once, after all of its changes are chosen.
+    --jobs requires --yes or --dry-run, because prompts must be
+    serial, and so does --format jsonl, which can't prompt.
     """
-    process_files(filename, update_examples_from_source_code)
+    from markdown_tools import records
+
+    def refuse(option: str) -> None:
+        message = f"{option} requires --yes or --dry-run"
+        if records.json_lines():  # Keep stdout all records
+            records.emit(
+                "error", file=None, line=None, message=message
+            )
+        else:
+            console.print(message)
+        raise typer.Exit(1)
+
+    if jobs != 1 and not (yes or dry_run):
+        refuse("--jobs")
+    if records.json_lines() and not (yes or dry_run):
+        refuse("--format jsonl")
+    from markdown_tools.update_examples import (
+        update_examples_from_source_code,
+    )
+
+    process_files(
+        filename,
+        update_examples_from_source_code,
+        yes,
+        only_blank_lines,
+        dry_run,
+        source,
+        jobs=jobs,
+        changed=changed,
+        source=source,
+    )
 
 
 @app.command("6", rich_help_panel="Modification")
@@ -173,11 +358,23 @@ def insert_codepaths(
             help="Markdown file to check (None: all files)"
         ),
     ] = None,
+    dry_run: Annotated[
+        bool,
+        typer.Option(
+            "--dry-run", help="Show the insertions without making them"
+        ),
+    ] = False,
+    jobs: Jobs = 1,
 ):
     """
-    Insert code path comment tag in a file that doesn't have one
+    Insert code path comment tag in a file that doesn't have one.
+    Each file is written once, after all of its tags are found.
     """
-    process_files(filename, insert_codepath_tags)
+    from markdown_tools.insert_codepath_tags import (
+        insert_codepath_tags,
+    )
+
+    process_files(filename, insert_codepath_tags, dry_run, jobs=jobs)
 
 
 @app.command("7", rich_help_panel="Modification")
@@ -193,6 +390,8 @@ def renumber_chapters(
     priority over another chapter with the same number.
     No flag: show what will be done. 'go' flag: do it.
     """
+    from markdown_tools.numbered_file import NumberedFile
+
     go_flag = False
     if go:
         if go == "go":
@@ -208,12 +407,22 @@ def renumber_chapters(
     ] = NumberedFile.appendices().changes
     if not chapter_changes and not appendix_changes:
         console.print("No Changes")
+    from markdown_tools import records
 
     def make_changes(changes: List[NumberedFile]):
         for change in changes:
-            console.print(
-                f"'{change.original_name}'  -->  '{change.new_name}'"
-            )
+            if records.json_lines():
+                records.emit(
+                    "rename",
+                    original=change.original_name,
+                    new=change.new_name,
+                    renamed=go_flag,
+                )
+            else:
+                console.print(
+                    f"'{change.original_name}'  -->  "
+                    f"'{change.new_name}'"
+                )
             if go_flag:
                 os.rename(change.original_name, change.new_name)
 
@@ -221,12 +430,145 @@ def renumber_chapters(
     make_changes(appendix_changes)
 
 
-# @callback used here only to produce the __doc__ string
+@app.command("who-uses", rich_help_panel="Validation")
+def who_uses(
+    source: Annotated[
+        Path, typer.Argument(help="Source file used by listings")
+    ],
+):
+    """
+    List the chapters and listings taken from a source file
+    """
+    from markdown_tools import records
+    from markdown_tools.usage_index import UsageIndex
+
+    uses = UsageIndex(Path(".")).uses(source)
+    if not uses:
+        if records.json_lines():
+            records.emit(
+                "error",
+                file=None,
+                line=None,
+                message=f"No listings use {source}",
+            )
+        else:
+            console.print(f"No listings use {source}")
+        raise typer.Exit(1)
+    for chapter, listing in uses:
+        if records.json_lines():
+            records.emit(
+                "use", source=source, chapter=chapter, listing=listing
+            )
+        else:
+            console.print(f"{chapter}: listing {listing}")
+
+
+@app.command("watch", rich_help_panel="Validation")
+def watch_changes():
+    """
+    Re-check each chapter as it changes, and compare the listings
+    taken from each source file as that file changes
+    """
+    from markdown_tools.watch import watch
+
+    watch(Path.cwd())
+
+
+@app.command("serve", rich_help_panel="Server")
+def serve_requests():
+    """
+    Keep this directory's Markdown files parsed in memory and run
+    commands 1-4 for the `mtc` client: `mtc 1 x.md` is `mt 1 x.md`
+    without the startup cost. Command 4 only displays differences.
+    """
+    from markdown_tools.server import serve
+
+    serve()
+
+
+# @callback produces the __doc__ string and sets global options
 @app.callback()
-def doc():
+def doc(
+    trace: Annotated[
+        str,
+        typer.Option(
+            "--trace",
+            envvar="MT_TRACE",
+            help="Call trace in error reports: off, on, sample:N, ring:N",
+        ),
+    ] = "off",
+    cache: Annotated[
+        bool,
+        typer.Option(
+            "--cache/--no-cache",
+            help="Reuse parsed Markdown files from earlier runs",
+        ),
+    ] = True,
+    diff: Annotated[
+        str,
+        typer.Option(
+            "--diff",
+            envvar="MT_DIFF_ENGINE",
+            help="Diff engine: auto, difflib, myers, patience",
+        ),
+    ] = "auto",
+    clear: Annotated[
+        bool,
+        typer.Option(
+            "--clear/--no-clear",
+            envvar="MT_CLEAR",
+            help="Clear the terminal before running a command",
+        ),
+    ] = True,
+    format: Annotated[
+        str,
+        typer.Option(
+            "--format",
+            envvar="MT_FORMAT",
+            help="rich, or jsonl for one JSON record per line",
+        ),
+    ] = "rich",
+    keep_going: Annotated[
+        bool,
+        typer.Option(
+            "--keep-going",
+            "-k",
+            # Not envvar=: click reads "0" as true for this flag, so
+            # error_reporter.keep_going() parses MT_KEEP_GOING itself
+            help="Check every file, then report all the errors "
+            "(or set MT_KEEP_GOING=1)",
+        ),
+    ] = False,
+):
     """
     Utilities for managing computer programming books written in Markdown
     """
+    # Only import a setting's module when it isn't the default:
+    try:
+        if trace != "off":
+            from markdown_tools.error_reporter import set_trace_mode
+
+            set_trace_mode(trace)
+        if diff != "auto":
+            from markdown_tools.compare_strings import set_diff_engine
+
+            set_diff_engine(diff)
+        if format != "rich":
+            from markdown_tools import records
+
+            records.set_format(format)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    if keep_going:
+        from markdown_tools.error_reporter import set_keep_going
+
+        set_keep_going(True)
+    if not cache:
+        from markdown_tools import parse_cache
+
+        parse_cache.set_enabled(False)
+    if clear:
+        console.clear()  # Does nothing if output isn't a terminal
 
 
 # @app.command("m", rich_help_panel="Menu")
@@ -242,7 +584,6 @@ def main(
     #     typer.Option("--menu", callback=menu_callback),
     # ] = None,
 ):
-    clear_screen()
     app()
 
 